@@ -0,0 +1,158 @@
+"""Search benchmark for ChessAI.
+
+Searches each reference position from perft.py to a fixed depth with every
+chosen configuration and reports time, nodes, nodes per second, the share
+of beta cutoffs made by the first move searched (a measure of move ordering)
+and the speed-up in time relative to the single-process search.  Root-split
+searches run in the workers, so no cutoff rate is shown for them.
+
+The single-process search runs first when it is chosen, and every other
+mode's move and score are checked against it.  Root splitting should always
+match; Lazy SMP may not, since its helpers' shared table entries change the
+main search's result from run to run.
+
+    python benchmark.py --depth 4
+    python benchmark.py --depth 5 --workers 4 --modes single root lazy_smp
+    python benchmark.py --depth 5 --no-null-move --no-lmr
+    python benchmark.py --evaluation 1000000
+
+--evaluation scores that many positions (random games from the start
+position, repeated) with the batch evaluator instead of searching.
+
+Worker processes help only when the machine has spare cores; on a single
+core the parallel modes are expected to be slower.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from code_logic.batch_eval import np
+from code_logic.bitboard import BitboardPosition, START_FEN, move_to_uci
+from code_logic.chess_ai import ChessAI
+from perft import REFERENCE_POSITIONS
+
+MODES = ('single', 'root', 'lazy_smp')
+
+
+def create_ai(mode, depth, workers, tt_size_mb, options):
+    if mode == 'single':
+        ai = ChessAI(None, None, depth=depth, tt_size_mb=tt_size_mb)
+    else:
+        ai = ChessAI(None, None, depth=depth, tt_size_mb=tt_size_mb, workers=workers, parallel_mode=mode)
+    for name, value in options.items():
+        setattr(ai, name, value)
+    return ai
+
+
+def run_mode(mode, positions, depth, workers, tt_size_mb, options):
+    """Return a list of (move, score, nodes, seconds, first-move cutoff rate or None), one per position"""
+    ai = create_ai(mode, depth, workers, tt_size_mb, options)
+    results = []
+    try:
+        for _, fen in positions:
+            ai.transposition_table.clear()
+            position = BitboardPosition.from_fen(fen, ai.square_values)
+            start_time = time.perf_counter()
+            move, score = ai.search(position)
+            seconds = time.perf_counter() - start_time
+            cutoff_rate = ai.move_orderer.first_move_cutoff_rate() if mode != 'root' else None
+            results.append((move, score, ai.positions_evaluated, seconds, cutoff_rate))
+    finally:
+        ai.close()
+    return results
+
+
+def sample_positions(count, square_values, seed=1):
+    """count positions from random games, each a random number of plies in"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        position = BitboardPosition.from_fen(START_FEN, square_values)
+        for _ in range(rng.randrange(80)):
+            legal_moves = position.legal_moves()
+            if not legal_moves:
+                break
+            position.make_move(rng.choice(legal_moves))
+        positions.append(position)
+    return positions
+
+
+def run_evaluation(count):
+    """Time the batch evaluator on count positions in both encodings"""
+    ai = ChessAI(None, None, book_path=None, tablebase_path=None)
+    evaluator = ai.get_batch_evaluator()
+    positions = sample_positions(min(count, 2000), ai.square_values)
+    expected = [position.score for position in positions]
+    repeats = -(-count // len(positions))
+    print(f"batch evaluation of {repeats * len(positions)} positions "
+          f"({'NumPy' if np is not None else 'pure Python, NumPy not installed'})")
+    for name, encode, evaluate in (('squares', evaluator.encode_squares, evaluator.evaluate_squares),
+                                   ('planes', evaluator.encode_planes, evaluator.evaluate_planes)):
+        encoded = encode(positions)
+        if list(evaluate(encoded)) != expected:
+            print(f"  {name}: scores differ from BitboardPosition.score")
+            return 1
+        batch = np.tile(encoded, (repeats, 1)) if np is not None else encoded * repeats
+        start_time = time.perf_counter()
+        evaluate(batch)
+        seconds = time.perf_counter() - start_time
+        print(f"  {name:<8} time {seconds:7.3f}s  positions/s {int(len(batch) / seconds):>9}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure ChessAI search speed on the reference positions.")
+    parser.add_argument('--depth', type=int, default=4, help="search depth (default: 4)")
+    parser.add_argument('--workers', type=int, default=2, help="processes for the parallel modes")
+    parser.add_argument('--hash', type=int, default=16, help="transposition table size in MB")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES), help="configurations to run")
+    parser.add_argument('--no-null-move', action='store_true', help="switch off null-move pruning")
+    parser.add_argument('--no-lmr', action='store_true', help="switch off late move reductions")
+    parser.add_argument('--evaluation', type=int, metavar='COUNT', help="benchmark batch evaluation of COUNT positions instead")
+    args = parser.parse_args(argv)
+
+    if args.evaluation:
+        return run_evaluation(args.evaluation)
+
+    options = {
+        'null_move_pruning': not args.no_null_move,
+        'late_move_reductions': not args.no_lmr,
+    }
+
+    positions = [(name, fen) for name, fen, _ in REFERENCE_POSITIONS]
+    # The other modes are compared against the single-process search
+    modes = sorted(args.modes, key=lambda mode: mode != 'single')
+    baseline = None
+    reference = None
+    for mode in modes:
+        results = run_mode(mode, positions, args.depth, args.workers, args.hash, options)
+        total_seconds = sum(result[3] for result in results)
+        if baseline is None:
+            baseline = total_seconds
+        print(f"{mode} (depth {args.depth}" + (f", {args.workers} workers)" if mode != 'single' else ")"))
+        if mode == 'single':
+            reference = results
+        mismatches = 0
+        for index, ((name, _), (move, score, nodes, seconds, cutoff_rate)) in enumerate(zip(positions, results)):
+            nps = int(nodes / seconds) if seconds > 0 else 0
+            first_cutoffs = f"{cutoff_rate:6.1%}" if cutoff_rate is not None else f"{'-':>6}"
+            line = (f"  {name:<11} {move_to_uci(move) if move else '-':<6} score {score:>7}  "
+                    f"nodes {nodes:>8}  time {seconds:7.3f}s  nps {nps:>7}  first-move cutoffs {first_cutoffs}")
+            if mode != 'single' and reference is not None:
+                single_move, single_score = reference[index][:2]
+                if (move, score) != (single_move, single_score):
+                    mismatches += 1
+                    line += (f"  MISMATCH (single {move_to_uci(single_move) if single_move else '-'} "
+                             f"score {single_score})")
+            print(line)
+        speedup = baseline / total_seconds if total_seconds > 0 else 0.0
+        print(f"  total time {total_seconds:.3f}s  speed-up {speedup:.2f}x relative to {modes[0]}")
+        if mode != 'single' and reference is not None:
+            print(f"  {mismatches} of {len(positions)} positions differ from single")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""Build the opening book used by ChessAI.
+
+Reads the opening moves of PGN games and of the games saved from the game
+menu, and writes a sorted binary book that ChessAI looks up through mmap.
+
+    python build_book.py --pgn games.pgn more_games.pgn
+    python build_book.py --saved-games saved_games --plies 12
+    python build_book.py --pgn games.pgn --probe "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1"
+
+Run it from the project folder, like main.py, so the book lands where
+ChessAI looks for it.  Castling and en passant do not exist in this game,
+so a PGN game is only read up to its first such move.
+"""
+
+import argparse
+import sys
+
+from code_logic.bitboard import BitboardPosition, move_to_uci
+from code_logic.chess_ai import DEFAULT_BOOK_PATH
+from code_logic.opening_book import BOOK_PLIES, OpeningBook, build_book
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the ChessAI opening book from PGN files and saved games.")
+    parser.add_argument('--pgn', nargs='*', default=[], help="PGN files to read")
+    parser.add_argument('--saved-games', metavar='DIRECTORY', help="folder of games saved from the game menu")
+    parser.add_argument('--plies', type=int, default=BOOK_PLIES, help=f"moves per game to store (default: {BOOK_PLIES})")
+    parser.add_argument('--output', default=DEFAULT_BOOK_PATH, help=f"book file to write (default: {DEFAULT_BOOK_PATH})")
+    parser.add_argument('--probe', metavar='FEN', help="after building, list the book moves for a position")
+    args = parser.parse_args(argv)
+
+    if not args.pgn and not args.saved_games:
+        parser.error("give --pgn files, --saved-games or both")
+
+    games, entries = build_book(args.output, args.pgn, args.saved_games, args.plies)
+    print(f"{args.output}: {entries} entries from {games} games")
+
+    if args.probe:
+        book = OpeningBook(args.output)
+        try:
+            for move, weight in book.probe(BitboardPosition.from_fen(args.probe).zobrist_key):
+                print(f"{move_to_uci(move)}: {weight}")
+        finally:
+            book.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
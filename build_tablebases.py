@@ -0,0 +1,56 @@
+"""Generate the endgame tablebases used by ChessAI.
+
+Solves king and queen, king and rook, and king and pawn against a bare king
+by retrograde analysis and writes one file per table.  It takes well under
+a minute and only has to be run once.
+
+    python build_tablebases.py
+    python build_tablebases.py --output tablebases --probe "8/8/8/4k3/8/8/8/R3K3 w - - 0 1"
+
+Run it from the project folder, like main.py, so the tables land where
+ChessAI looks for them.
+"""
+
+import argparse
+import sys
+
+from code_logic.bitboard import BitboardPosition
+from code_logic.chess_ai import DEFAULT_TABLEBASE_PATH
+from code_logic.tablebase import LOSS, WIN, DRAW, Tablebases, generate_all
+
+
+def report(name, table, seconds):
+    wins = sum(1 for value in table if 0 < value < LOSS)
+    losses = sum(1 for value in table if value >= LOSS)
+    longest = max(value - LOSS for value in table if value >= LOSS)
+    print(f"{name}: {wins} wins, {losses} losses, longest mate {longest} plies, {seconds:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the KQK, KRK and KPK endgame tables.")
+    parser.add_argument('--output', default=DEFAULT_TABLEBASE_PATH,
+                        help=f"folder to write the tables to (default: {DEFAULT_TABLEBASE_PATH})")
+    parser.add_argument('--probe', metavar='FEN', help="after generating, look up a position")
+    args = parser.parse_args(argv)
+
+    generate_all(args.output, report)
+
+    if args.probe:
+        tablebases = Tablebases(args.output)
+        try:
+            result = tablebases.probe(BitboardPosition.from_fen(args.probe))
+        finally:
+            tablebases.close()
+        if result is None:
+            print("no table covers this position")
+        elif result[0] == WIN:
+            print(f"side to move mates in {result[1]} plies")
+        elif result[0] == DRAW:
+            print("draw")
+        else:
+            print(f"side to move is mated in {result[1]} plies")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Batch evaluation of many positions at once.
+
+Scores the same material plus piece-square evaluation as
+BitboardPosition.score (ChessAI.square_values), but for N positions in one
+call, for analysis tools that score positions by the million.  Positions
+come in one of two compact encodings:
+
+- square index: an (N, 64) int8 array holding a piece code per square,
+  0 for empty and color * 6 + piece_type + 1 otherwise (see encode_squares)
+- piece planes: an (N, 12) uint64 array of the twelve bitboards of
+  BitboardPosition.to_compact(), white pawn to king then black (see encode_planes)
+
+NumPy is optional.  Without it the same methods take and return lists and
+score them in plain Python, which is correct but far slower.
+"""
+
+from .bitboard import PAWN, QUEEN, PROMOTION_ROW
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EMPTY = 0
+PLANES = 12
+# Rows scored per NumPy pass, which bounds the size of the index arrays
+CHUNK_ROWS = 65536
+
+
+def piece_code(color, piece_type):
+    return color * 6 + piece_type + 1
+
+
+class BatchEvaluator:
+    def __init__(self, square_values):
+        # code_values[code][square]; row 0 (empty) is all zeros so captures of nothing cost nothing
+        self.code_values = [[0] * 64] + [
+            list(square_values[color][piece_type]) for color in range(2) for piece_type in range(6)
+        ]
+        if np is not None:
+            self.table = np.array(self.code_values, dtype=np.int32)
+            self.flat_table = self.table.ravel()
+            self.square_offsets = np.arange(64, dtype=np.intp)
+            # byte_values[plane * 8 + byte][value]: the score of the pieces whose bits are set
+            # in that byte of the plane, so a plane is scored with eight lookups instead of 64
+            bits = (np.arange(256)[:, None] >> np.arange(8)) & 1
+            square_values_by_byte = self.table[1:].reshape(PLANES * 8, 8)
+            self.byte_values = (square_values_by_byte @ bits.T).astype(np.int32).ravel()
+            self.byte_offsets = np.arange(PLANES * 8, dtype=np.intp) * 256
+
+    def encode_squares(self, positions):
+        """Square-index encoding of BitboardPositions"""
+        rows = [[EMPTY if piece is None else piece_code(*piece) for piece in position.mailbox]
+                for position in positions]
+        if np is None:
+            return rows
+        return np.array(rows, dtype=np.int8).reshape(len(rows), 64)
+
+    def encode_planes(self, positions):
+        """Piece-plane encoding of BitboardPositions"""
+        rows = [position.to_compact()[1:] for position in positions]
+        if np is None:
+            return rows
+        return np.array(rows, dtype=np.uint64).reshape(len(rows), PLANES)
+
+    def evaluate_squares(self, codes):
+        """White-relative scores of square-index encoded positions"""
+        if np is None:
+            return [sum(self.code_values[code][square] for square, code in enumerate(row) if code)
+                    for row in codes]
+        scores = np.empty(len(codes), dtype=np.int64)
+        for start in range(0, len(codes), CHUNK_ROWS):
+            chunk = codes[start:start + CHUNK_ROWS]
+            # Flat index code * 64 + square, so the whole chunk is one gather
+            indices = chunk.astype(np.intp) * 64 + self.square_offsets
+            scores[start:start + CHUNK_ROWS] = self.flat_table[indices].sum(axis=1, dtype=np.int64)
+        return scores
+
+    def evaluate_planes(self, planes):
+        """White-relative scores of piece-plane encoded positions"""
+        if np is None:
+            scores = []
+            for row in planes:
+                score = 0
+                for plane, bitboard in enumerate(row):
+                    values = self.code_values[plane + 1]
+                    while bitboard:
+                        low_bit = bitboard & -bitboard
+                        bitboard ^= low_bit
+                        score += values[low_bit.bit_length() - 1]
+                scores.append(score)
+            return scores
+        # Little-endian bytes: byte n of a plane holds squares 8n to 8n + 7
+        planes = np.ascontiguousarray(planes, dtype='<u8').view(np.uint8)
+        scores = np.empty(len(planes), dtype=np.int64)
+        for start in range(0, len(planes), CHUNK_ROWS):
+            indices = planes[start:start + CHUNK_ROWS].astype(np.intp) + self.byte_offsets
+            scores[start:start + CHUNK_ROWS] = self.byte_values[indices].sum(axis=1, dtype=np.int64)
+        return scores
+
+    def evaluate(self, positions):
+        """White-relative scores of BitboardPositions"""
+        return self.evaluate_squares(self.encode_squares(positions))
+
+    def evaluate_children(self, position, moves):
+        """Score of position after each of moves, without making them
+
+        Each score is position.score plus the move's change: the moving piece
+        (a queen when a pawn promotes) taken off its square and put on the
+        target, and any captured piece removed.
+        """
+        from_squares = [move & 63 for move in moves]
+        to_squares = [move >> 6 for move in moves]
+        mailbox = position.mailbox
+        movers = [piece_code(*mailbox[square]) for square in from_squares]
+        captured = [EMPTY if mailbox[square] is None else piece_code(*mailbox[square]) for square in to_squares]
+        color = position.side_to_move
+        pawn, queen = piece_code(color, PAWN), piece_code(color, QUEEN)
+        landed = [queen if mover == pawn and square >> 3 == PROMOTION_ROW[color] else mover
+                  for mover, square in zip(movers, to_squares)]
+        if np is None:
+            values = self.code_values
+            return [position.score + values[new][to] - values[old][start] - values[taken][to]
+                    for old, new, taken, start, to in zip(movers, landed, captured, from_squares, to_squares)]
+        table = self.table
+        movers, landed, captured, from_squares, to_squares = (
+            np.array(values, dtype=np.intp) for values in (movers, landed, captured, from_squares, to_squares))
+        return (position.score + table[landed, to_squares] - table[movers, from_squares]
+                - table[captured, to_squares]).astype(np.int64)
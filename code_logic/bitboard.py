@@ -0,0 +1,415 @@
+"""Bitboard position used by ChessAI for search.
+
+One 64-bit integer per piece type and colour plus occupancy masks.  Squares
+are indexed ``row * 8 + col`` so they map directly onto the ``(row, col)``
+positions used by ChessBoard and Piece.  The rules mirror the Piece classes:
+no castling or en passant, pawns may advance two squares from their starting
+row, and a pawn reaching the last row becomes a queen.
+"""
+
+import random
+
+from .movegen import (
+    WHITE, BLACK, PAWN_START_ROW, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, ORTHOGONAL_RAYS, DIAGONAL_RAYS,
+    rook_attacks, bishop_attacks, append_moves,
+)
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+COLOR_NAMES = ('white', 'black')
+PIECE_NAMES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+COLOR_INDEX = {name: index for index, name in enumerate(COLOR_NAMES)}
+PIECE_INDEX = {name: index for index, name in enumerate(PIECE_NAMES)}
+
+FEN_SYMBOLS = 'pnbrqk'
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1'
+
+PAWN_DIRECTION = (8, -8)
+PROMOTION_ROW = (7, 0)
+
+
+def square_of(position):
+    row, col = position
+    return row * 8 + col
+
+
+def position_of(square):
+    return (square >> 3, square & 7)
+
+
+def encode_move(from_square, to_square):
+    return from_square | (to_square << 6)
+
+
+def move_from(move):
+    return move & 63
+
+
+def move_to(move):
+    return move >> 6
+
+
+def mirror_move(move):
+    """The same move seen from the other side, as in BitboardPosition.mirrored()"""
+    return move ^ (56 | 56 << 6)
+
+
+# FEN and coordinate notation use standard ranks: white starts on rows 0-1 and
+# its pawns move towards row 7, so rank = row + 1.  (The move list in the UI
+# labels rows from the top of the screen instead.)
+def square_name(square):
+    return 'abcdefgh'[square & 7] + str((square >> 3) + 1)
+
+
+def parse_square(name):
+    return (int(name[1]) - 1) * 8 + 'abcdefgh'.index(name[0])
+
+
+def move_to_uci(move):
+    return square_name(move & 63) + square_name(move >> 6)
+
+
+def uci_to_move(text):
+    return encode_move(parse_square(text[0:2]), parse_square(text[2:4]))
+
+
+def iter_bits(bitboard):
+    while bitboard:
+        low_bit = bitboard & -bitboard
+        yield low_bit.bit_length() - 1
+        bitboard ^= low_bit
+
+
+# Fixed seed so that keys agree between processes and across runs
+_zobrist_random = random.Random(0x5EED)
+ZOBRIST_PIECES = [[[_zobrist_random.getrandbits(64) for _ in range(64)] for _ in range(6)] for _ in range(2)]
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+
+
+# Square values that leave BitboardPosition.score at zero
+ZERO_SQUARE_VALUES = [[[0] * 64 for _ in range(6)] for _ in range(2)]
+
+
+class BitboardPosition:
+    def __init__(self, square_values=None):
+        # square_values[color][piece_type][square] is added to score whenever
+        # that piece stands on that square, so black entries are negative and
+        # score is the white-relative evaluation kept up to date by make/undo.
+        self.square_values = square_values or ZERO_SQUARE_VALUES
+        self.score = 0
+        self.pieces = [[0] * 6, [0] * 6]
+        self.occupied = [0, 0]
+        self.mailbox = [None] * 64
+        self.side_to_move = WHITE
+        self.zobrist_key = 0
+        self.history = []
+
+    @classmethod
+    def from_board(cls, board, side_to_move, square_values=None):
+        """Build a position from the pieces of a ChessBoard"""
+        position = cls(square_values)
+        for piece in board.pieces:
+            position.put_piece(COLOR_INDEX[piece.color], PIECE_INDEX[piece.type], square_of(piece.position))
+        position.side_to_move = COLOR_INDEX[side_to_move]
+        if position.side_to_move == BLACK:
+            position.zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+        return position
+
+    @classmethod
+    def from_fen(cls, fen, square_values=None):
+        """Build a position from FEN; castling and en passant fields are ignored"""
+        fields = fen.split()
+        position = cls(square_values)
+        for rank_index, rank in enumerate(fields[0].split('/')):
+            row = 7 - rank_index
+            col = 0
+            for symbol in rank:
+                if symbol.isdigit():
+                    col += int(symbol)
+                    continue
+                color = WHITE if symbol.isupper() else BLACK
+                position.put_piece(color, FEN_SYMBOLS.index(symbol.lower()), row * 8 + col)
+                col += 1
+        if len(fields) > 1 and fields[1] == 'b':
+            position.side_to_move = BLACK
+            position.zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+        return position
+
+    def mirrored(self):
+        """Copy with the colours swapped and the rows flipped, the same game from the other side"""
+        position = type(self)(self.square_values)
+        for square, piece in enumerate(self.mailbox):
+            if piece is not None:
+                position.put_piece(piece[0] ^ 1, piece[1], square ^ 56)
+        if self.side_to_move == WHITE:
+            position.side_to_move = BLACK
+            position.zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+        return position
+
+    def to_compact(self):
+        """Side to move followed by the twelve piece bitboards, cheap to pickle"""
+        return (self.side_to_move,) + tuple(self.pieces[WHITE]) + tuple(self.pieces[BLACK])
+
+    @classmethod
+    def from_compact(cls, data, square_values=None):
+        position = cls(square_values)
+        for index, bitboard in enumerate(data[1:]):
+            color, piece_type = divmod(index, 6)
+            while bitboard:
+                low_bit = bitboard & -bitboard
+                bitboard ^= low_bit
+                position.put_piece(color, piece_type, low_bit.bit_length() - 1)
+        if data[0] == BLACK:
+            position.side_to_move = BLACK
+            position.zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+        return position
+
+    def to_fen(self):
+        ranks = []
+        for row in range(7, -1, -1):
+            rank = ''
+            empty = 0
+            for col in range(8):
+                piece = self.mailbox[row * 8 + col]
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                symbol = FEN_SYMBOLS[piece[1]]
+                rank += symbol.upper() if piece[0] == WHITE else symbol
+            if empty:
+                rank += str(empty)
+            ranks.append(rank)
+        return '/'.join(ranks) + (' w' if self.side_to_move == WHITE else ' b') + ' - - 0 1'
+
+    def put_piece(self, color, piece_type, square):
+        bit = 1 << square
+        self.pieces[color][piece_type] |= bit
+        self.occupied[color] |= bit
+        self.mailbox[square] = (color, piece_type)
+        self.zobrist_key ^= ZOBRIST_PIECES[color][piece_type][square]
+        self.score += self.square_values[color][piece_type][square]
+
+    def remove_piece(self, color, piece_type, square):
+        mask = ~(1 << square)
+        self.pieces[color][piece_type] &= mask
+        self.occupied[color] &= mask
+        self.mailbox[square] = None
+        self.zobrist_key ^= ZOBRIST_PIECES[color][piece_type][square]
+        self.score -= self.square_values[color][piece_type][square]
+
+    def piece_at(self, square):
+        """Return (color, piece_type) for the square or None"""
+        return self.mailbox[square]
+
+    def king_square(self, color):
+        king = self.pieces[color][KING]
+        if not king:
+            return None
+        return king.bit_length() - 1
+
+    def is_square_attacked(self, square, by_color, occupied=None):
+        """Look outward from square along knight, pawn, king and slider patterns for a piece of by_color"""
+        pieces = self.pieces[by_color]
+        if PAWN_ATTACKS[by_color ^ 1][square] & pieces[PAWN]:
+            return True
+        if KNIGHT_ATTACKS[square] & pieces[KNIGHT]:
+            return True
+        if KING_ATTACKS[square] & pieces[KING]:
+            return True
+        if occupied is None:
+            occupied = self.occupied[WHITE] | self.occupied[BLACK]
+        queens = pieces[QUEEN]
+        if (pieces[ROOK] | queens) and rook_attacks(square, occupied) & (pieces[ROOK] | queens):
+            return True
+        if (pieces[BISHOP] | queens) and bishop_attacks(square, occupied) & (pieces[BISHOP] | queens):
+            return True
+        return False
+
+    def attackers(self, square, by_color):
+        """Bitboard of the pieces of by_color that attack square"""
+        pieces = self.pieces[by_color]
+        occupied = self.occupied[WHITE] | self.occupied[BLACK]
+        return (PAWN_ATTACKS[by_color ^ 1][square] & pieces[PAWN]
+                | KNIGHT_ATTACKS[square] & pieces[KNIGHT]
+                | KING_ATTACKS[square] & pieces[KING]
+                | rook_attacks(square, occupied) & (pieces[ROOK] | pieces[QUEEN])
+                | bishop_attacks(square, occupied) & (pieces[BISHOP] | pieces[QUEEN]))
+
+    def in_check(self, color=None):
+        if color is None:
+            color = self.side_to_move
+        king_square = self.king_square(color)
+        if king_square is None:
+            return False
+        return self.is_square_attacked(king_square, color ^ 1)
+
+    def generate_moves(self, captures_only=False):
+        """Pseudo-legal moves for the side to move
+
+        With captures_only, only captures and pawn pushes onto the promotion
+        row are generated, which is what quiescence search needs.
+        """
+        color = self.side_to_move
+        pieces = self.pieces[color]
+        own = self.occupied[color]
+        enemy = self.occupied[color ^ 1]
+        occupied = own | enemy
+        targets = enemy if captures_only else ~own
+        moves = []
+
+        step = PAWN_DIRECTION[color]
+        start_row = PAWN_START_ROW[color]
+        promotion_row = PROMOTION_ROW[color]
+        pawn_captures = PAWN_ATTACKS[color]
+        pawns = pieces[PAWN]
+        while pawns:
+            low_bit = pawns & -pawns
+            pawns ^= low_bit
+            square = low_bit.bit_length() - 1
+            target = square + step
+            if 0 <= target < 64 and not occupied >> target & 1:
+                if not captures_only or target >> 3 == promotion_row:
+                    moves.append(square | (target << 6))
+                if not captures_only and square >> 3 == start_row and not occupied >> (target + step) & 1:
+                    moves.append(square | ((target + step) << 6))
+            append_moves(moves, square, pawn_captures[square] & enemy)
+
+        for piece_type, attack_table in ((KNIGHT, KNIGHT_ATTACKS), (KING, KING_ATTACKS)):
+            bitboard = pieces[piece_type]
+            while bitboard:
+                low_bit = bitboard & -bitboard
+                bitboard ^= low_bit
+                square = low_bit.bit_length() - 1
+                append_moves(moves, square, attack_table[square] & targets)
+
+        bitboard = pieces[BISHOP] | pieces[QUEEN]
+        while bitboard:
+            low_bit = bitboard & -bitboard
+            bitboard ^= low_bit
+            square = low_bit.bit_length() - 1
+            append_moves(moves, square, bishop_attacks(square, occupied) & targets)
+        bitboard = pieces[ROOK] | pieces[QUEEN]
+        while bitboard:
+            low_bit = bitboard & -bitboard
+            bitboard ^= low_bit
+            square = low_bit.bit_length() - 1
+            append_moves(moves, square, rook_attacks(square, occupied) & targets)
+        return moves
+
+    def legality_info(self):
+        """Return (in_check, pins) for the side to move
+
+        pins maps the square of each pinned piece to the ray from the king
+        through it; a pinned piece may only move along that ray.
+        """
+        color = self.side_to_move
+        king_square = self.king_square(color)
+        if king_square is None:
+            return False, {}
+        enemy_pieces = self.pieces[color ^ 1]
+        own = self.occupied[color]
+        occupied = own | self.occupied[color ^ 1]
+        pins = {}
+        for sliders, ray_directions in (
+                (enemy_pieces[ROOK] | enemy_pieces[QUEEN], ORTHOGONAL_RAYS),
+                (enemy_pieces[BISHOP] | enemy_pieces[QUEEN], DIAGONAL_RAYS)):
+            if not sliders:
+                continue
+            for rays, positive in ray_directions:
+                ray = rays[king_square]
+                blockers = ray & occupied
+                if not blockers:
+                    continue
+                first = (blockers & -blockers).bit_length() - 1 if positive else blockers.bit_length() - 1
+                if not own >> first & 1:
+                    continue
+                beyond = rays[first] & occupied
+                if not beyond:
+                    continue
+                second = (beyond & -beyond).bit_length() - 1 if positive else beyond.bit_length() - 1
+                if sliders >> second & 1:
+                    pins[first] = ray
+        return self.is_square_attacked(king_square, color ^ 1), pins
+
+    def is_legal(self, move, legality=None):
+        """Check that a pseudo-legal move does not leave the mover's king attacked
+
+        With the legality_info of the current position, king moves are checked
+        against the attack map and other moves only need a make/undo probe
+        while in check; otherwise only pinned pieces are restricted.
+        """
+        if legality is not None:
+            in_check, pins = legality
+            from_square = move & 63
+            to_square = move >> 6
+            if self.mailbox[from_square][1] == KING:
+                occupied = (self.occupied[WHITE] | self.occupied[BLACK]) ^ (1 << from_square)
+                return not self.is_square_attacked(to_square, self.side_to_move ^ 1, occupied)
+            if not in_check:
+                ray = pins.get(from_square)
+                return ray is None or bool(ray >> to_square & 1)
+
+        color = self.side_to_move
+        self.make_move(move)
+        legal = not self.in_check(color)
+        self.undo_move()
+        return legal
+
+    def legal_moves(self):
+        legality = self.legality_info()
+        return [move for move in self.generate_moves() if self.is_legal(move, legality)]
+
+    def make_move(self, move):
+        from_square = move & 63
+        to_square = move >> 6
+        color, piece_type = self.mailbox[from_square]
+        captured = self.mailbox[to_square]
+        if captured is not None:
+            self.remove_piece(captured[0], captured[1], to_square)
+        self.remove_piece(color, piece_type, from_square)
+        if piece_type == PAWN and to_square >> 3 == PROMOTION_ROW[color]:
+            self.put_piece(color, QUEEN, to_square)
+        else:
+            self.put_piece(color, piece_type, to_square)
+        self.history.append((move, piece_type, captured))
+        self.side_to_move = color ^ 1
+        self.zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+
+    def make_null_move(self):
+        """Pass the turn without moving, for null-move pruning"""
+        self.history.append(None)
+        self.side_to_move ^= 1
+        self.zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+
+    def undo_null_move(self):
+        self.history.pop()
+        self.side_to_move ^= 1
+        self.zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+
+    def undo_to(self, ply):
+        """Take back moves and null moves until ply moves remain in the history"""
+        while len(self.history) > ply:
+            if self.history[-1] is None:
+                self.undo_null_move()
+            else:
+                self.undo_move()
+
+    def has_pieces(self, color):
+        """True when color has a knight, bishop, rook or queen"""
+        pieces = self.pieces[color]
+        return bool(pieces[KNIGHT] | pieces[BISHOP] | pieces[ROOK] | pieces[QUEEN])
+
+    def undo_move(self):
+        move, piece_type, captured = self.history.pop()
+        from_square = move & 63
+        to_square = move >> 6
+        color = self.side_to_move ^ 1
+        self.remove_piece(color, self.mailbox[to_square][1], to_square)
+        self.put_piece(color, piece_type, from_square)
+        if captured is not None:
+            self.put_piece(captured[0], captured[1], to_square)
+        self.side_to_move = color
+        self.zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
@@ -0,0 +1,96 @@
+"""Board model shared by the game screen, the rules and the AI.
+
+BoardState holds the pieces and a 64-square index and imports nothing from
+pygame, so GameRules and ChessAI can run without a display, as perft.py
+does.  ChessBoard extends it with the piece images, drawing and mouse input.
+"""
+
+from .piece import Rook, Knight, Bishop, Queen, King, Pawn
+
+PIECE_CLASSES = {
+    'rook': Rook,
+    'knight': Knight,
+    'bishop': Bishop,
+    'queen': Queen,
+    'king': King,
+    'pawn': Pawn
+}
+
+
+class BoardState:
+    def __init__(self):
+        self.squares = [None] * 64
+        # Bumped on every change to the pieces, so cached results can tell they are stale
+        self.version = 0
+        self.set_pieces(self.initialize_pieces())
+
+    def initialize_pieces(self):
+        back_row = ['rook', 'knight', 'bishop', 'queen', 'king', 'bishop', 'knight', 'rook']
+        pieces = []
+        for color, first_row, pawn_row in (('white', 0, 1), ('black', 7, 6)):
+            for col, piece_type in enumerate(back_row):
+                pieces.append(self.create_piece(piece_type, color, (first_row, col)))
+            for col in range(8):
+                pieces.append(self.create_piece('pawn', color, (pawn_row, col)))
+        return pieces
+
+    def create_piece(self, piece_type, color, position):
+        return PIECE_CLASSES[piece_type](None, None, color, position)
+
+    def set_pieces(self, pieces):
+        self.pieces = pieces
+        self.version += 1
+        self.squares = [None] * 64
+        for piece in pieces:
+            row, col = piece.position
+            self.squares[row * 8 + col] = piece
+
+    def add_piece(self, piece):
+        self.pieces.append(piece)
+        self.version += 1
+        row, col = piece.position
+        self.squares[row * 8 + col] = piece
+
+    def remove_piece(self, piece):
+        self.pieces.remove(piece)
+        self.version += 1
+        row, col = piece.position
+        if self.squares[row * 8 + col] is piece:
+            self.squares[row * 8 + col] = None
+
+    def place_piece(self, piece, new_position):
+        # keeps the square index in sync when a piece changes square
+        self.version += 1
+        row, col = piece.position
+        if self.squares[row * 8 + col] is piece:
+            self.squares[row * 8 + col] = None
+        piece.position = new_position
+        row, col = new_position
+        self.squares[row * 8 + col] = piece
+
+    def get_piece_at(self, position):
+        row, col = position
+        if 0 <= row < 8 and 0 <= col < 8:
+            return self.squares[row * 8 + col]
+        return None
+
+    def move_piece(self, piece, new_position):
+        if piece and piece.move(new_position, self):
+            return True
+        return False
+
+    def is_empty_square(self, row, col):
+        return self.squares[row * 8 + col] is None
+
+    def is_opponent_piece(self, row, col, current_color):
+        piece = self.squares[row * 8 + col]
+        return piece is not None and piece.color != current_color
+
+    def get_pieces_by_color(self, color):
+        return [piece for piece in self.pieces if piece.color == color]
+
+    def find_king(self, color):
+        for piece in self.pieces:
+            if isinstance(piece, King) and piece.color == color:
+                return piece
+        return None
@@ -1,354 +1,753 @@
-from .piece import King, Queen, Rook, Bishop, Knight, Pawn
-import time
-
-class ChessAI:
-    def __init__(self, board, game_rules, depth=3):
-        self.board = board
-        self.game_rules = game_rules
-        self.depth = depth
-        
-        self.piece_values = {
-            'pawn': 100,
-            'knight': 320,
-            'bishop': 330,
-            'rook': 500,
-            'queen': 900,
-            'king': 20000
-        }
-        
-        self.pawn_table = [
-            [0,  0,  0,  0,  0,  0,  0,  0],
-            [50, 50, 50, 50, 50, 50, 50, 50],
-            [10, 10, 20, 30, 30, 20, 10, 10],
-            [5,  5, 10, 25, 25, 10,  5,  5],
-            [0,  0,  0, 20, 20,  0,  0,  0],
-            [5, -5,-10,  0,  0,-10, -5,  5],
-            [5, 10, 10,-20,-20, 10, 10,  5],
-            [0,  0,  0,  0,  0,  0,  0,  0]
-        ]
-        
-        self.knight_table = [
-            [-50,-40,-30,-30,-30,-30,-40,-50],
-            [-40,-20,  0,  0,  0,  0,-20,-40],
-            [-30,  0, 10, 15, 15, 10,  0,-30],
-            [-30,  5, 15, 20, 20, 15,  5,-30],
-            [-30,  0, 15, 20, 20, 15,  0,-30],
-            [-30,  5, 10, 15, 15, 10,  5,-30],
-            [-40,-20,  0,  5,  5,  0,-20,-40],
-            [-50,-40,-30,-30,-30,-30,-40,-50]
-        ]
-        
-        self.bishop_table = [
-            [-20,-10,-10,-10,-10,-10,-10,-20],
-            [-10,  0,  0,  0,  0,  0,  0,-10],
-            [-10,  0,  5, 10, 10,  5,  0,-10],
-            [-10,  5,  5, 10, 10,  5,  5,-10],
-            [-10,  0, 10, 10, 10, 10,  0,-10],
-            [-10, 10, 10, 10, 10, 10, 10,-10],
-            [-10,  5,  0,  0,  0,  0,  5,-10],
-            [-20,-10,-10,-10,-10,-10,-10,-20]
-        ]
-        
-        self.rook_table = [
-            [0,  0,  0,  0,  0,  0,  0,  0],
-            [5, 10, 10, 10, 10, 10, 10,  5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [-5,  0,  0,  0,  0,  0,  0, -5],
-            [0,  0,  0,  5,  5,  0,  0,  0]
-        ]
-        
-        self.queen_table = [
-            [-20,-10,-10, -5, -5,-10,-10,-20],
-            [-10,  0,  0,  0,  0,  0,  0,-10],
-            [-10,  0,  5,  5,  5,  5,  0,-10],
-            [-5,  0,  5,  5,  5,  5,  0, -5],
-            [0,  0,  5,  5,  5,  5,  0, -5],
-            [-10,  5,  5,  5,  5,  5,  0,-10],
-            [-10,  0,  5,  0,  0,  0,  0,-10],
-            [-20,-10,-10, -5, -5,-10,-10,-20]
-        ]
-        
-        self.king_table = [
-            [-30,-40,-40,-50,-50,-40,-40,-30],
-            [-30,-40,-40,-50,-50,-40,-40,-30],
-            [-30,-40,-40,-50,-50,-40,-40,-30],
-            [-30,-40,-40,-50,-50,-40,-40,-30],
-            [-20,-30,-30,-40,-40,-30,-30,-20],
-            [-10,-20,-20,-20,-20,-20,-20,-10],
-            [20, 20,  0,  0,  0,  0, 20, 20],
-            [20, 30, 10,  0,  0, 10, 30, 20]
-        ]
-
-    def create_virtual_board(self):
-        """Create a virtual board state for AI calculations"""
-        virtual_pieces = []
-        for piece in self.board.pieces:
-            virtual_piece = {
-                'type': piece.type,
-                'color': piece.color,
-                'position': piece.position,
-                'moved_once': getattr(piece, 'moved_once', None)
-            }
-            virtual_pieces.append(virtual_piece)
-        return virtual_pieces
-
-    def get_virtual_piece_at(self, virtual_board, position):
-        """Get piece at position in virtual board"""
-        for piece in virtual_board:
-            if piece['position'] == position:
-                return piece
-        return None
-
-    def make_virtual_move(self, virtual_board, piece, move):
-        """Make a move on virtual board and return what was captured"""
-        captured_piece = self.get_virtual_piece_at(virtual_board, move)
-        if captured_piece:
-            virtual_board.remove(captured_piece)
-        
-        old_position = piece['position']
-        piece['position'] = move
-        
-        old_moved_once = piece.get('moved_once')
-        if piece['type'] == 'pawn':
-            piece['moved_once'] = True
-            
-        return captured_piece, old_position, old_moved_once
-
-    def undo_virtual_move(self, virtual_board, piece, old_position, captured_piece, old_moved_once):
-        """Undo a move on virtual board"""
-        piece['position'] = old_position
-        
-        if captured_piece:
-            virtual_board.append(captured_piece)
-            
-        if old_moved_once is not None:
-            piece['moved_once'] = old_moved_once
-
-    def get_virtual_possible_moves(self, virtual_board, piece):
-        """Get possible moves for a piece on virtual board"""
-        # Create a temporary real piece to use existing move logic
-        piece_classes = {
-            'rook': Rook, 'knight': Knight, 'bishop': Bishop,
-            'queen': Queen, 'king': King, 'pawn': Pawn
-        }
-        
-        # Create temporary piece
-        piece_class = piece_classes[piece['type']]
-        temp_piece = piece_class(None, None, piece['color'], piece['position'])
-        if piece['type'] == 'pawn' and piece.get('moved_once') is not None:
-            temp_piece.moved_once = piece['moved_once']
-        
-        # Create temporary board wrapper
-        class VirtualBoardWrapper:
-            def __init__(self, virtual_pieces):
-                self.virtual_pieces = virtual_pieces
-                
-            def get_piece_at(self, position):
-                for p in self.virtual_pieces:
-                    if p['position'] == position:
-                        # Return a simple object with color attribute
-                        class SimplePiece:
-                            def __init__(self, color):
-                                self.color = color
-                        return SimplePiece(p['color'])
-                return None
-                
-            def is_empty_square(self, row, col):
-                return self.get_piece_at((row, col)) is None
-                
-            def is_opponent_piece(self, row, col, current_color):
-                piece = self.get_piece_at((row, col))
-                return piece is not None and piece.color != current_color
-        
-        virtual_board_wrapper = VirtualBoardWrapper(virtual_board)
-        return temp_piece.get_possible_moves(virtual_board_wrapper)
-
-    def is_virtual_move_legal(self, virtual_board, piece, destination):
-        """Check if move is legal on virtual board"""
-        # Create temporary game state
-        old_position = piece['position']
-        captured_piece = self.get_virtual_piece_at(virtual_board, destination)
-        
-        # Make temporary move
-        if captured_piece:
-            virtual_board.remove(captured_piece)
-        piece['position'] = destination
-        
-        # Check if king is in check
-        king_piece = None
-        for p in virtual_board:
-            if p['type'] == 'king' and p['color'] == piece['color']:
-                king_piece = p
-                break
-                
-        in_check = False
-        if king_piece:
-            king_pos = king_piece['position']
-            opponent_pieces = [p for p in virtual_board if p['color'] != piece['color']]
-            
-            for opp_piece in opponent_pieces:
-                possible_moves = self.get_virtual_possible_moves(virtual_board, opp_piece)
-                if king_pos in possible_moves:
-                    in_check = True
-                    break
-        
-        # Undo temporary move
-        piece['position'] = old_position
-        if captured_piece:
-            virtual_board.append(captured_piece)
-            
-        return not in_check
-
-    def get_best_move(self, color):
-        """Returns the best move for the given color using minimax with alpha-beta pruning."""
-        self.positions_evaluated = 0
-        start_time = time.time()
-        
-        best_value = float('-inf') if color == 'white' else float('inf')
-        best_move = None
-        alpha = float('-inf')
-        beta = float('inf')
-        
-        # Create virtual board for calculations
-        virtual_board = self.create_virtual_board()
-        pieces = [p for p in virtual_board if p['color'] == color]
-        
-        for piece in pieces:
-            possible_moves = self.get_virtual_possible_moves(virtual_board, piece)
-            for move in possible_moves:
-                if self.is_virtual_move_legal(virtual_board, piece, move):
-                    self.positions_evaluated += 1
-                    
-                    # Make virtual move
-                    captured_piece, old_position, old_moved_once = self.make_virtual_move(virtual_board, piece, move)
-                    
-                    if color == 'white':
-                        value = self.minimax_virtual(virtual_board, self.depth - 1, alpha, beta, False)
-                        if value > best_value:
-                            best_value = value
-                            # Find the real piece that corresponds to this virtual piece
-                            real_piece = None
-                            for real_p in self.board.pieces:
-                                if (real_p.type == piece['type'] and 
-                                    real_p.color == piece['color'] and 
-                                    real_p.position == old_position):
-                                    real_piece = real_p
-                                    break
-                            best_move = (real_piece, move)
-                        alpha = max(alpha, value)
-                    else:
-                        value = self.minimax_virtual(virtual_board, self.depth - 1, alpha, beta, True)
-                        if value < best_value:
-                            best_value = value
-                            # Find the real piece that corresponds to this virtual piece
-                            real_piece = None
-                            for real_p in self.board.pieces:
-                                if (real_p.type == piece['type'] and 
-                                    real_p.color == piece['color'] and 
-                                    real_p.position == old_position):
-                                    real_piece = real_p
-                                    break
-                            best_move = (real_piece, move)
-                        beta = min(beta, value)
-                    
-                    # Undo virtual move
-                    self.undo_virtual_move(virtual_board, piece, old_position, captured_piece, old_moved_once)
-                    
-                    if alpha >= beta:
-                        break
-        
-        evaluation_time = time.time() - start_time
-        
-        if hasattr(self, 'status_display'):
-            self.status_display.update_ai_stats(
-                self.depth,
-                self.positions_evaluated,
-                evaluation_time
-            )
-        
-        return best_move
-
-    def minimax_virtual(self, virtual_board, depth, alpha, beta, maximizing_player):
-        """Minimax algorithm using virtual board"""
-        if depth == 0:
-            return self.evaluate_virtual_position(virtual_board)
-        
-        if maximizing_player:
-            max_eval = float('-inf')
-            pieces = [p for p in virtual_board if p['color'] == 'white']
-            
-            for piece in pieces:
-                possible_moves = self.get_virtual_possible_moves(virtual_board, piece)
-                for move in possible_moves:
-                    if self.is_virtual_move_legal(virtual_board, piece, move):
-                        # Make virtual move
-                        captured_piece, old_position, old_moved_once = self.make_virtual_move(virtual_board, piece, move)
-                        
-                        eval = self.minimax_virtual(virtual_board, depth - 1, alpha, beta, False)
-                        max_eval = max(max_eval, eval)
-                        alpha = max(alpha, eval)
-                        
-                        # Undo virtual move
-                        self.undo_virtual_move(virtual_board, piece, old_position, captured_piece, old_moved_once)
-                        
-                        if beta <= alpha:
-                            break
-                            
-            return max_eval
-        else:
-            min_eval = float('inf')
-            pieces = [p for p in virtual_board if p['color'] == 'black']
-            
-            for piece in pieces:
-                possible_moves = self.get_virtual_possible_moves(virtual_board, piece)
-                for move in possible_moves:
-                    if self.is_virtual_move_legal(virtual_board, piece, move):
-                        # Make virtual move
-                        captured_piece, old_position, old_moved_once = self.make_virtual_move(virtual_board, piece, move)
-                        
-                        eval = self.minimax_virtual(virtual_board, depth - 1, alpha, beta, True)
-                        min_eval = min(min_eval, eval)
-                        beta = min(beta, eval)
-                        
-                        # Undo virtual move
-                        self.undo_virtual_move(virtual_board, piece, old_position, captured_piece, old_moved_once)
-                        
-                        if beta <= alpha:
-                            break
-                            
-            return min_eval
-
-    def evaluate_virtual_position(self, virtual_board):
-        """Evaluate virtual board position"""
-        total_eval = 0
-        
-        for piece in virtual_board:
-            piece_value = self.piece_values[piece['type']]
-            position_value = self.get_virtual_position_value(piece)
-            
-            if piece['color'] == 'white':
-                total_eval += piece_value + position_value
-            else:
-                total_eval -= piece_value + position_value
-                
-        return total_eval
-    
-    def get_virtual_position_value(self, piece):
-        """Get position value for virtual piece"""
-        row, col = piece['position']
-        if piece['color'] == 'black':
-            row = 7 - row
-            
-        position_tables = {
-            'pawn': self.pawn_table,
-            'knight': self.knight_table,
-            'bishop': self.bishop_table,
-            'rook': self.rook_table,
-            'queen': self.queen_table,
-            'king': self.king_table
-        }
-        
-        return position_tables[piece['type']][row][col]
\ No newline at end of file
+from .bitboard import BitboardPosition, WHITE, PAWN, QUEEN, PIECE_NAMES, COLOR_NAMES, PROMOTION_ROW, position_of
+from .transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from .move_ordering import MoveOrderer
+from .opening_book import open_book
+from .tablebase import open_tablebases, WIN, LOSS_RESULT
+import time
+
+INFINITY = 1000000
+MATE_SCORE = 100000
+# Scores beyond this are mates; they are stored relative to the node in the
+# transposition table so that the same entry is valid at any ply.
+MATE_THRESHOLD = MATE_SCORE - 1000
+# Depth cap for time-limited searches
+MAX_SEARCH_DEPTH = 32
+# How many nodes to search between checks of the clock and the stop signal
+TIME_CHECK_INTERVAL = 1024
+# Opening book used when one has been built (see build_book.py)
+DEFAULT_BOOK_PATH = 'opening_book.bin'
+# Endgame tables used when they have been generated (see build_tablebases.py)
+DEFAULT_TABLEBASE_PATH = 'tablebases'
+# Safety margin for delta pruning in quiescence search (about two pawns)
+DELTA_MARGIN = 200
+# Half-width of the first aspiration window around the previous iteration's
+# score; it grows fourfold on each failure and is dropped past the limit
+ASPIRATION_WINDOW = 50
+ASPIRATION_LIMIT = 1000
+# Null-move pruning: the depth taken off the reply search, and the least
+# remaining depth at which it is tried
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+# Late move reductions: quiet moves after the first few are searched one ply
+# shallower (two plies from the LMR_DEEP_MOVE-th move on at LMR_DEEP_DEPTH)
+LMR_MIN_DEPTH = 3
+LMR_FULL_DEPTH_MOVES = 3
+LMR_DEEP_MOVE = 6
+LMR_DEEP_DEPTH = 6
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out"""
+
+
+def score_to_tt(score, ply):
+    if score > MATE_THRESHOLD:
+        return score + ply
+    if score < -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    if score > MATE_THRESHOLD:
+        return score - ply
+    if score < -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+class ChessAI:
+    def __init__(self, board, game_rules, depth=3, tt_size_mb=16, time_limit=None, workers=1, parallel_mode='root',
+                 book_path=DEFAULT_BOOK_PATH, tablebase_path=DEFAULT_TABLEBASE_PATH):
+        self.board = board
+        self.game_rules = game_rules
+        # Maximum depth; with a time_limit (seconds) the search deepens until time runs out
+        self.depth = depth
+        self.time_limit = time_limit
+        # With more than one worker the search uses a process pool: 'root' splits
+        # the root moves between processes, 'lazy_smp' runs helper searches that
+        # share the transposition table
+        self.workers = workers
+        self.parallel_mode = parallel_mode
+        self.executor = None
+        # Shared with the root-split workers so that moves they are searching can be aborted
+        self.root_stop_flag = None
+        self.lazy_smp = None
+        # Cancellation token: any object with is_set(), such as threading.Event;
+        # the search stops soon after it is set
+        self.stop_signal = None
+        # Nodes after which the search stops, checked like the deadline; the first
+        # iteration always completes so there is a move to play
+        self.node_limit = None
+        # Selective search; either can be switched off to compare results
+        self.null_move_pruning = True
+        self.late_move_reductions = True
+        # Pondering: after a move, search the predicted reply while the opponent thinks
+        self.ponder = True
+        self.pondering = False
+        self.ponder_move = None
+        self.search_start = None
+        # Called after each completed iteration with (depth, score, nodes, seconds, principal variation)
+        self.info_callback = None
+        # None when there is no book file or no tables
+        self.opening_book = open_book(book_path)
+        self.tablebases = open_tablebases(tablebase_path)
+        self.tt_size_mb = tt_size_mb
+        self.transposition_table = TranspositionTable(tt_size_mb)
+        self.positions_evaluated = 0
+        self.depth_reached = 0
+        self.deadline = None
+        
+        self.piece_values = {
+            'pawn': 100,
+            'knight': 320,
+            'bishop': 330,
+            'rook': 500,
+            'queen': 900,
+            'king': 20000
+        }
+        
+        self.pawn_table = [
+            [0,  0,  0,  0,  0,  0,  0,  0],
+            [50, 50, 50, 50, 50, 50, 50, 50],
+            [10, 10, 20, 30, 30, 20, 10, 10],
+            [5,  5, 10, 25, 25, 10,  5,  5],
+            [0,  0,  0, 20, 20,  0,  0,  0],
+            [5, -5,-10,  0,  0,-10, -5,  5],
+            [5, 10, 10,-20,-20, 10, 10,  5],
+            [0,  0,  0,  0,  0,  0,  0,  0]
+        ]
+        
+        self.knight_table = [
+            [-50,-40,-30,-30,-30,-30,-40,-50],
+            [-40,-20,  0,  0,  0,  0,-20,-40],
+            [-30,  0, 10, 15, 15, 10,  0,-30],
+            [-30,  5, 15, 20, 20, 15,  5,-30],
+            [-30,  0, 15, 20, 20, 15,  0,-30],
+            [-30,  5, 10, 15, 15, 10,  5,-30],
+            [-40,-20,  0,  5,  5,  0,-20,-40],
+            [-50,-40,-30,-30,-30,-30,-40,-50]
+        ]
+        
+        self.bishop_table = [
+            [-20,-10,-10,-10,-10,-10,-10,-20],
+            [-10,  0,  0,  0,  0,  0,  0,-10],
+            [-10,  0,  5, 10, 10,  5,  0,-10],
+            [-10,  5,  5, 10, 10,  5,  5,-10],
+            [-10,  0, 10, 10, 10, 10,  0,-10],
+            [-10, 10, 10, 10, 10, 10, 10,-10],
+            [-10,  5,  0,  0,  0,  0,  5,-10],
+            [-20,-10,-10,-10,-10,-10,-10,-20]
+        ]
+        
+        self.rook_table = [
+            [0,  0,  0,  0,  0,  0,  0,  0],
+            [5, 10, 10, 10, 10, 10, 10,  5],
+            [-5,  0,  0,  0,  0,  0,  0, -5],
+            [-5,  0,  0,  0,  0,  0,  0, -5],
+            [-5,  0,  0,  0,  0,  0,  0, -5],
+            [-5,  0,  0,  0,  0,  0,  0, -5],
+            [-5,  0,  0,  0,  0,  0,  0, -5],
+            [0,  0,  0,  5,  5,  0,  0,  0]
+        ]
+        
+        self.queen_table = [
+            [-20,-10,-10, -5, -5,-10,-10,-20],
+            [-10,  0,  0,  0,  0,  0,  0,-10],
+            [-10,  0,  5,  5,  5,  5,  0,-10],
+            [-5,  0,  5,  5,  5,  5,  0, -5],
+            [0,  0,  5,  5,  5,  5,  0, -5],
+            [-10,  5,  5,  5,  5,  5,  0,-10],
+            [-10,  0,  5,  0,  0,  0,  0,-10],
+            [-20,-10,-10, -5, -5,-10,-10,-20]
+        ]
+        
+        self.king_table = [
+            [-30,-40,-40,-50,-50,-40,-40,-30],
+            [-30,-40,-40,-50,-50,-40,-40,-30],
+            [-30,-40,-40,-50,-50,-40,-40,-30],
+            [-30,-40,-40,-50,-50,-40,-40,-30],
+            [-20,-30,-30,-40,-40,-30,-30,-20],
+            [-10,-20,-20,-20,-20,-20,-20,-10],
+            [20, 20,  0,  0,  0,  0, 20, 20],
+            [20, 30, 10,  0,  0, 10, 30, 20]
+        ]
+
+        self.position_tables = {
+            'pawn': self.pawn_table,
+            'knight': self.knight_table,
+            'bishop': self.bishop_table,
+            'rook': self.rook_table,
+            'queen': self.queen_table,
+            'king': self.king_table
+        }
+        self.square_values = self.build_square_values()
+        self.batch_evaluator = None
+        self.move_orderer = MoveOrderer(self.piece_values)
+
+    def build_square_values(self):
+        """Material plus piece-square value per color, piece type and square, negated for black"""
+        square_values = []
+        for color in COLOR_NAMES:
+            sign = 1 if color == 'white' else -1
+            square_values.append([
+                [sign * (self.piece_values[piece_type] + self.get_virtual_position_value(piece_type, color, square))
+                 for square in range(64)]
+                for piece_type in PIECE_NAMES
+            ])
+        return square_values
+
+    def create_virtual_board(self, color):
+        """Create a bitboard position for AI calculations"""
+        return BitboardPosition.from_board(self.board, color, self.square_values)
+
+    def make_virtual_move(self, virtual_board, move):
+        """Make a move on the virtual board"""
+        virtual_board.make_move(move)
+
+    def undo_virtual_move(self, virtual_board):
+        """Undo the last move made on the virtual board"""
+        virtual_board.undo_move()
+
+    def get_virtual_possible_moves(self, virtual_board):
+        """Get pseudo-legal moves for the side to move on the virtual board"""
+        return virtual_board.generate_moves()
+
+    def is_virtual_move_legal(self, virtual_board, move, legality=None):
+        """Check if move is legal on virtual board, using legality_info of the position when given"""
+        return virtual_board.is_legal(move, legality)
+
+    def get_best_move(self, color, stop_signal=None):
+        """Returns the best move for the given color using iterative deepening minimax with alpha-beta pruning.
+
+        stop_signal replaces the cancellation token; when it is set before the
+        search finishes, None is returned instead of a move.
+        """
+        if stop_signal is not None:
+            self.stop_signal = stop_signal
+        # Create virtual board for calculations
+        virtual_board = self.create_virtual_board(color)
+        if self.opening_book is not None:
+            book_move = self.opening_book.choose_move(virtual_board)
+            if book_move is not None:
+                self.ponder_move = None
+                return self.to_board_move(book_move)
+        best_move, _ = self.search(virtual_board)
+        if self.stop_signal is not None and self.stop_signal.is_set():
+            return None
+        return self.to_board_move(best_move)
+
+    def get_ponder_board(self, color):
+        """Virtual board after the predicted reply to our last move, with color to move again
+
+        Returns None when there is no prediction or it is not legal on the board.
+        """
+        if self.ponder_move is None:
+            return None
+        opponent = 'black' if color == 'white' else 'white'
+        virtual_board = self.create_virtual_board(opponent)
+        if self.ponder_move not in virtual_board.legal_moves():
+            return None
+        self.make_virtual_move(virtual_board, self.ponder_move)
+        del virtual_board.history[:]
+        return virtual_board
+
+    def ponder_search(self, virtual_board):
+        """Search a ponder board until ponder_hit() or stop_signal; returns (best move, score)
+
+        Until the hit there is no time limit, so the search keeps deepening
+        (up to self.depth without a time_limit).  A dropped search still
+        leaves its results in the transposition table.
+        """
+        self.pondering = True
+        try:
+            return self.search(virtual_board)
+        finally:
+            self.pondering = False
+
+    def ponder_hit(self):
+        """The opponent played the predicted reply: the ponder search becomes the real search"""
+        self.pondering = False
+        self.search_start = time.time()
+        if self.time_limit is not None:
+            self.deadline = self.search_start + self.time_limit
+
+    def predict_reply(self, virtual_board, move):
+        """The transposition table's best reply to move, or None"""
+        self.make_virtual_move(virtual_board, move)
+        entry = self.transposition_table.probe(virtual_board.zobrist_key)
+        reply = entry[3] if entry else None
+        if reply is not None and reply not in virtual_board.legal_moves():
+            reply = None
+        self.undo_virtual_move(virtual_board)
+        return reply
+
+    def search(self, virtual_board):
+        """Iterative deepening search of a virtual board; returns (best move, score)"""
+        self.positions_evaluated = 0
+        self.depth_reached = 0
+        self.search_start = time.time()
+        self.transposition_table.new_search()
+        self.move_orderer.new_search()
+
+        max_depth = self.depth if self.time_limit is None else MAX_SEARCH_DEPTH
+        root_ply = len(virtual_board.history)
+        best_move = None
+        best_value = 0
+
+        # With a table for the position there is nothing left to search
+        tablebase_result = self.tablebase_root_move(virtual_board)
+        if tablebase_result is not None:
+            best_value, best_move = tablebase_result
+            max_depth = 0
+            # Reported as a one-ply search so callers see the move and its exact score
+            self.depth_reached = 1
+            if self.info_callback is not None:
+                self.info_callback(1, best_value, self.positions_evaluated, time.time() - self.search_start, [best_move])
+
+        for depth in range(1, max_depth + 1):
+            # Depth 1 always completes so there is a move to play
+            if depth > 1 and self.time_limit is not None and not self.pondering:
+                self.deadline = self.search_start + self.time_limit
+            try:
+                if self.workers > 1 and self.parallel_mode == 'root' and depth > 1:
+                    value, move = self.search_root_parallel(virtual_board, depth, best_move)
+                else:
+                    value, move = self.search_aspiration(virtual_board, depth, best_move, best_value)
+            except SearchTimeout:
+                break
+            finally:
+                self.deadline = None
+                # An aborted iteration leaves the board somewhere in the tree
+                virtual_board.undo_to(root_ply)
+            if move is None:
+                break
+            best_move = move
+            best_value = value
+            self.depth_reached = depth
+            if self.info_callback is not None:
+                self.info_callback(depth, value, self.positions_evaluated, time.time() - self.search_start,
+                                   self.principal_variation(virtual_board, best_move, depth))
+
+            if abs(value) > MATE_THRESHOLD:
+                break
+            # An iteration takes several times longer than the previous one,
+            # so do not start one that is unlikely to finish
+            if self.time_limit is not None and not self.pondering and time.time() - self.search_start > self.time_limit / 2:
+                break
+
+        evaluation_time = time.time() - self.search_start
+        self.ponder_move = self.predict_reply(virtual_board, best_move) if best_move is not None else None
+
+        if hasattr(self, 'status_display'):
+            self.status_display.update_ai_stats(
+                self.depth_reached,
+                self.positions_evaluated,
+                evaluation_time
+            )
+
+        return best_move, best_value
+
+    def principal_variation(self, virtual_board, best_move, length):
+        """best_move followed by the transposition table's best replies, at most length moves"""
+        root_ply = len(virtual_board.history)
+        pv = []
+        move = best_move
+        seen = set()
+        while move is not None and len(pv) < length and virtual_board.zobrist_key not in seen:
+            if move not in virtual_board.legal_moves():
+                break
+            seen.add(virtual_board.zobrist_key)
+            pv.append(move)
+            self.make_virtual_move(virtual_board, move)
+            entry = self.transposition_table.probe(virtual_board.zobrist_key)
+            move = entry[3] if entry else None
+        virtual_board.undo_to(root_ply)
+        return pv
+
+    def tablebase_root_move(self, virtual_board):
+        """(score, move) of the best move by the endgame tables, or None when they do not cover every move"""
+        if self.tablebases is None or self.tablebases.probe(virtual_board) is None:
+            return None
+        best_key = None
+        best_move = None
+        for move in virtual_board.legal_moves():
+            virtual_board.make_move(move)
+            result = self.tablebases.probe(virtual_board)
+            virtual_board.undo_move()
+            if result is None:
+                return None
+            # The opponent's loss is best, soonest first; their win is worst, latest first
+            child_result, plies = result
+            key = (child_result, plies if child_result == LOSS_RESULT else -plies)
+            if best_key is None or key < best_key:
+                best_key = key
+                best_move = move
+        if best_move is None:
+            return None
+        child_result, plies = best_key[0], abs(best_key[1])
+        return self.tablebase_score(-child_result, plies + 1, len(virtual_board.history), virtual_board.side_to_move), best_move
+
+    def tablebase_score(self, result, plies, ply, side_to_move):
+        """Search score for a table result of the side to move, mate distances counted from the root"""
+        if result == WIN:
+            score = MATE_SCORE - ply - plies
+        elif result == LOSS_RESULT:
+            score = -MATE_SCORE + ply + plies
+        else:
+            return 0
+        return score if side_to_move == WHITE else -score
+
+    def search_aspiration(self, virtual_board, depth, previous_best, previous_value):
+        """Search the root inside a window around the previous score, widening it until the score lands inside"""
+        if previous_best is None or abs(previous_value) > MATE_THRESHOLD:
+            return self.search_root_window(virtual_board, depth, previous_best, -INFINITY, INFINITY)
+
+        window = ASPIRATION_WINDOW
+        alpha, beta = previous_value - window, previous_value + window
+        while True:
+            value, move = self.search_root_window(virtual_board, depth, previous_best, alpha, beta)
+            if alpha < value < beta or move is None:
+                return value, move
+            window *= 4
+            if value <= alpha:
+                alpha = value - window if window <= ASPIRATION_LIMIT else -INFINITY
+            else:
+                # The move that failed high is the best candidate for the re-search
+                previous_best = move
+                beta = value + window if window <= ASPIRATION_LIMIT else INFINITY
+
+    def search_root_window(self, virtual_board, depth, previous_best, alpha, beta):
+        if self.workers > 1 and self.parallel_mode == 'lazy_smp':
+            return self.search_root_lazy_smp(virtual_board, depth, previous_best, alpha, beta)
+        return self.search_root(virtual_board, depth, previous_best, alpha, beta)
+
+    def search_root_parallel(self, virtual_board, depth, previous_best):
+        """Split the root moves across worker processes, best-ordered moves first"""
+        # Imported here so that the single-process search does not load multiprocessing
+        from .parallel_search import SharedFlag, create_executor, search_root_parallel
+
+        if self.executor is None:
+            self.root_stop_flag = SharedFlag()
+            self.executor = create_executor(self.workers, self.tt_size_mb, self.search_options(), self.root_stop_flag)
+        entry = self.transposition_table.probe(virtual_board.zobrist_key)
+        tt_move = previous_best if previous_best is not None else entry[3] if entry else None
+        legality = virtual_board.legality_info()
+        moves = [move for move in self.move_orderer.order(virtual_board, self.get_virtual_possible_moves(virtual_board), 0, tt_move)
+                 if self.is_virtual_move_legal(virtual_board, move, legality)]
+        best_value, best_move = search_root_parallel(self, self.executor, virtual_board, moves, depth, INFINITY,
+                                                    self.root_stop_flag)
+        if best_move is not None:
+            self.transposition_table.store(virtual_board.zobrist_key, depth, EXACT, best_value, best_move)
+        return best_value, best_move
+
+    def search_root_lazy_smp(self, virtual_board, depth, previous_best, alpha=-INFINITY, beta=INFINITY):
+        """Search the root here while helper processes fill the shared transposition table"""
+        from .parallel_search import LazySMP
+
+        if self.lazy_smp is None:
+            self.lazy_smp = LazySMP(self.workers - 1, self.tt_size_mb, self.search_options())
+            self.lazy_smp.transposition_table.age = self.transposition_table.age
+            self.transposition_table = self.lazy_smp.transposition_table
+        return self.lazy_smp.search_root(self, virtual_board, depth, previous_best, alpha, beta)
+
+    def search_options(self):
+        """Switches that worker processes copy so they search the same way"""
+        return {
+            'null_move_pruning': self.null_move_pruning,
+            'late_move_reductions': self.late_move_reductions,
+        }
+
+    def close(self):
+        """Shut down the worker processes of the parallel search and close the book and tables"""
+        if self.executor is not None:
+            self.root_stop_flag.set()
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+            self.root_stop_flag.close()
+            self.root_stop_flag = None
+        if self.lazy_smp is not None:
+            self.transposition_table = TranspositionTable(self.tt_size_mb)
+            self.lazy_smp.close()
+            self.lazy_smp = None
+        if self.opening_book is not None:
+            self.opening_book.close()
+            self.opening_book = None
+        if self.tablebases is not None:
+            self.tablebases.close()
+            self.tablebases = None
+
+    def search_root(self, virtual_board, depth, previous_best, alpha=-INFINITY, beta=INFINITY):
+        """Search every root move to depth, trying the previous iteration's best move first
+
+        The score is exact only when it lies strictly inside (alpha, beta);
+        otherwise it is a bound and the caller widens the window.
+        """
+        maximizing = virtual_board.side_to_move == WHITE
+        best_value = -INFINITY if maximizing else INFINITY
+        best_move = None
+        original_alpha, original_beta = alpha, beta
+
+        entry = self.transposition_table.probe(virtual_board.zobrist_key)
+        tt_move = previous_best if previous_best is not None else entry[3] if entry else None
+
+        legality = virtual_board.legality_info()
+        moves = self.move_orderer.order(virtual_board, self.get_virtual_possible_moves(virtual_board), 0, tt_move)
+        for move in moves:
+            if not self.is_virtual_move_legal(virtual_board, move, legality):
+                continue
+            self.make_virtual_move(virtual_board, move)
+            value = self.search_move(virtual_board, depth - 1, alpha, beta, maximizing, best_move is None)
+            self.undo_virtual_move(virtual_board)
+
+            if maximizing:
+                if value > best_value or best_move is None:
+                    best_value = value
+                    best_move = move
+                alpha = max(alpha, value)
+            else:
+                if value < best_value or best_move is None:
+                    best_value = value
+                    best_move = move
+                beta = min(beta, value)
+            if beta <= alpha:
+                break
+
+        if best_move is not None:
+            if best_value <= original_alpha:
+                flag = UPPER_BOUND
+            elif best_value >= original_beta:
+                flag = LOWER_BOUND
+            else:
+                flag = EXACT
+            self.transposition_table.store(virtual_board.zobrist_key, depth, flag, best_value, best_move)
+        return best_value, best_move
+
+    def search_move(self, virtual_board, depth, alpha, beta, maximizing_player, first_move, reduction=0):
+        """Principal variation search of the position after one of maximizing_player's moves
+
+        The first move gets the full window.  Later moves are only tested
+        against a null window to prove they are no better, and searched again
+        with the full window when that test fails.  A reduced move is tested
+        at depth - reduction first and only searched to full depth if it
+        beats alpha (or beta for the minimizing side).
+        """
+        if first_move:
+            return self.minimax_virtual(virtual_board, depth, alpha, beta, not maximizing_player)
+        if reduction:
+            if maximizing_player:
+                value = self.minimax_virtual(virtual_board, depth - reduction, alpha, alpha + 1, False)
+                if value <= alpha:
+                    return value
+            else:
+                value = self.minimax_virtual(virtual_board, depth - reduction, beta - 1, beta, True)
+                if value >= beta:
+                    return value
+        if maximizing_player:
+            value = self.minimax_virtual(virtual_board, depth, alpha, alpha + 1, False)
+        else:
+            value = self.minimax_virtual(virtual_board, depth, beta - 1, beta, True)
+        if alpha < value < beta:
+            value = self.minimax_virtual(virtual_board, depth, alpha, beta, not maximizing_player)
+        return value
+
+    def to_board_move(self, move):
+        """Translate a virtual move into (piece, destination) on the real board"""
+        if move is None:
+            return None
+        real_piece = self.board.get_piece_at(position_of(move & 63))
+        return (real_piece, position_of(move >> 6))
+
+    def minimax_virtual(self, virtual_board, depth, alpha, beta, maximizing_player):
+        """Minimax algorithm using virtual board"""
+        if depth == 0:
+            return self.quiescence_virtual(virtual_board, alpha, beta, maximizing_player)
+        self.visit_node()
+
+        ply = len(virtual_board.history)
+        if self.tablebases is not None and (virtual_board.occupied[0] | virtual_board.occupied[1]).bit_count() <= 3:
+            result = self.tablebases.probe(virtual_board)
+            if result is not None:
+                return self.tablebase_score(result[0], result[1], ply, virtual_board.side_to_move)
+
+        key = virtual_board.zobrist_key
+        original_alpha, original_beta = alpha, beta
+        tt_move = None
+        entry = self.transposition_table.probe(key)
+        if entry:
+            tt_depth, flag, tt_score, tt_move = entry
+            if tt_depth >= depth:
+                tt_score = score_from_tt(tt_score, ply)
+                if flag == EXACT:
+                    return tt_score
+                if flag == LOWER_BOUND:
+                    alpha = max(alpha, tt_score)
+                else:
+                    beta = min(beta, tt_score)
+                if alpha >= beta:
+                    return tt_score
+
+        legality = virtual_board.legality_info()
+        in_check = legality[0]
+
+        # Null-move pruning: if passing the turn still fails high, a real move
+        # would too.  Not in check, not twice in a row, and not without pieces,
+        # where passing may be the only thing that is not a loss (zugzwang).
+        if (self.null_move_pruning and depth >= NULL_MOVE_MIN_DEPTH and beta - alpha == 1
+                and not in_check and virtual_board.history and virtual_board.history[-1] is not None
+                and virtual_board.has_pieces(virtual_board.side_to_move)):
+            static_value = self.evaluate_virtual_position(virtual_board)
+            if static_value >= beta if maximizing_player else static_value <= alpha:
+                virtual_board.make_null_move()
+                value = self.minimax_virtual(virtual_board, depth - 1 - NULL_MOVE_REDUCTION, alpha, beta, not maximizing_player)
+                virtual_board.undo_null_move()
+                # A mate found after passing proves nothing, so only the bound is returned
+                if maximizing_player and value >= beta:
+                    return beta
+                if not maximizing_player and value <= alpha:
+                    return alpha
+
+        best_value = -INFINITY if maximizing_player else INFINITY
+        best_move = None
+        moves_searched = 0
+        moves = self.move_orderer.order(virtual_board, self.get_virtual_possible_moves(virtual_board), ply, tt_move)
+        for move in moves:
+            if not self.is_virtual_move_legal(virtual_board, move, legality):
+                continue
+            # Late move reductions for quiet moves that ordering put near the end
+            reduction = 0
+            if (self.late_move_reductions and depth >= LMR_MIN_DEPTH and moves_searched >= LMR_FULL_DEPTH_MOVES
+                    and not in_check and move != tt_move and self.move_orderer.is_quiet(virtual_board, move)):
+                reduction = 2 if moves_searched >= LMR_DEEP_MOVE and depth >= LMR_DEEP_DEPTH else 1
+            self.make_virtual_move(virtual_board, move)
+            if reduction and virtual_board.in_check():
+                reduction = 0
+            value = self.search_move(virtual_board, depth - 1, alpha, beta, maximizing_player, best_move is None, reduction)
+            self.undo_virtual_move(virtual_board)
+
+            if maximizing_player:
+                if value > best_value or best_move is None:
+                    best_value = value
+                    best_move = move
+                alpha = max(alpha, value)
+            else:
+                if value < best_value or best_move is None:
+                    best_value = value
+                    best_move = move
+                beta = min(beta, value)
+
+            if beta <= alpha:
+                self.move_orderer.record_cutoff(virtual_board, move, ply, depth, moves_searched)
+                break
+            moves_searched += 1
+
+        if best_move is None:
+            # No legal moves: checkmate scores prefer the shortest mate, stalemate is a draw
+            if legality[0]:
+                return -MATE_SCORE + ply if maximizing_player else MATE_SCORE - ply
+            return 0
+
+        if best_value <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_value >= original_beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.transposition_table.store(key, depth, flag, score_to_tt(best_value, ply), best_move)
+        return best_value
+
+    def quiescence_virtual(self, virtual_board, alpha, beta, maximizing_player):
+        """Search captures only until the position is quiet, so the horizon never cuts an exchange in half"""
+        self.visit_node()
+        ply = len(virtual_board.history)
+        legality = virtual_board.legality_info()
+        in_check = legality[0]
+
+        if in_check:
+            # Standing pat is not an option in check: every evasion is searched
+            best_value = -INFINITY if maximizing_player else INFINITY
+            moves = virtual_board.generate_moves()
+        else:
+            # Stand pat: the side to move may decline every capture
+            stand_pat = self.evaluate_virtual_position(virtual_board)
+            if maximizing_player:
+                if stand_pat >= beta:
+                    return stand_pat
+                alpha = max(alpha, stand_pat)
+            else:
+                if stand_pat <= alpha:
+                    return stand_pat
+                beta = min(beta, stand_pat)
+            best_value = stand_pat
+            moves = virtual_board.generate_moves(captures_only=True)
+
+        piece_values = self.move_orderer.piece_values
+        found_legal_move = False
+        for move in self.move_orderer.order(virtual_board, moves, ply):
+            if not in_check:
+                # Delta pruning: skip captures that cannot lift the score back into the window
+                captured = virtual_board.mailbox[move >> 6]
+                gain = DELTA_MARGIN + (piece_values[captured[1]] if captured is not None else 0)
+                if virtual_board.mailbox[move & 63][1] == PAWN and (move >> 6) >> 3 == PROMOTION_ROW[virtual_board.side_to_move]:
+                    gain += piece_values[QUEEN] - piece_values[PAWN]
+                if maximizing_player and stand_pat + gain <= alpha:
+                    continue
+                if not maximizing_player and stand_pat - gain >= beta:
+                    continue
+            if not self.is_virtual_move_legal(virtual_board, move, legality):
+                continue
+            found_legal_move = True
+            self.make_virtual_move(virtual_board, move)
+            value = self.quiescence_virtual(virtual_board, alpha, beta, not maximizing_player)
+            self.undo_virtual_move(virtual_board)
+
+            if maximizing_player:
+                best_value = max(best_value, value)
+                alpha = max(alpha, value)
+            else:
+                best_value = min(best_value, value)
+                beta = min(beta, value)
+            if beta <= alpha:
+                break
+
+        if in_check and not found_legal_move:
+            return -MATE_SCORE + ply if maximizing_player else MATE_SCORE - ply
+        return best_value
+
+    def visit_node(self):
+        """Count a search node and abort once the time budget is spent or a stop is signalled"""
+        self.positions_evaluated += 1
+        if self.positions_evaluated % TIME_CHECK_INTERVAL == 0:
+            if self.deadline is not None and time.time() >= self.deadline:
+                raise SearchTimeout()
+            if self.stop_signal is not None and self.stop_signal.is_set():
+                raise SearchTimeout()
+            if self.node_limit is not None and self.depth_reached and self.positions_evaluated >= self.node_limit:
+                raise SearchTimeout()
+
+    def evaluate_virtual_position(self, virtual_board):
+        """Evaluate virtual board position (kept up to date incrementally by make/undo)"""
+        return virtual_board.score
+
+    def evaluate_virtual_positions(self, virtual_boards):
+        """Evaluate many virtual boards in one call, vectorized with NumPy when it is installed"""
+        return self.get_batch_evaluator().evaluate(virtual_boards)
+
+    def evaluate_virtual_children(self, virtual_board, moves):
+        """Evaluation of the virtual board after each of moves, without making them"""
+        return self.get_batch_evaluator().evaluate_children(virtual_board, moves)
+
+    def get_batch_evaluator(self):
+        # Created on first use so that the search alone never imports NumPy
+        if self.batch_evaluator is None:
+            from .batch_eval import BatchEvaluator
+            self.batch_evaluator = BatchEvaluator(self.square_values)
+        return self.batch_evaluator
+
+    def get_virtual_position_value(self, piece_type, color, square):
+        """Get position value for a piece on a virtual board square"""
+        row, col = position_of(square)
+        if color == 'black':
+            row = 7 - row
+
+        return self.position_tables[piece_type][row][col]
@@ -1,7 +1,11 @@
 import pygame
-from .piece import Rook, Knight, Bishop, Queen, King, Pawn
+from .board_state import BoardState
+from .piece import Pawn
+from .sprite_atlas import get_sprite_atlas
+
+class ChessBoard(BoardState):
+    """BoardState drawn on a pygame surface, with piece images and mouse input"""
 
-class ChessBoard:
     def __init__(self, screen, width, height):
      
         self.screen = screen
@@ -12,74 +16,45 @@ class ChessBoard:
         self.board_offset_y = (height - self.tile_size * 8) // 2
         self.light_color = (240, 217, 181)
         self.dark_color = (181, 136, 99)
+        self.border_width = 2
+        # Pre-rendered squares and border by tile size
+        self.board_layers = {}
 
-        self.pieces_image = pygame.image.load('Pieces/ChessPiecesArray.png').convert_alpha()
-        self.piece_size = self.pieces_image.get_height() // 2
-
-        self.pieces = self.initialize_pieces()
+        self.sprite_atlas = get_sprite_atlas(self.tile_size)
 
-    def initialize_pieces(self):
-        pieces = []
-        white_positions = {
-            Rook: [(0, 0), (0, 7)],
-            Knight: [(0, 1), (0, 6)],
-            Bishop: [(0, 2), (0, 5)],
-            Queen: [(0, 3)],
-            King: [(0, 4)],
-            Pawn: [(1, col) for col in range(8)]
-        }
-        black_positions = {
-            Rook: [(7, 0), (7, 7)],
-            Knight: [(7, 1), (7, 6)],
-            Bishop: [(7, 2), (7, 5)],
-            Queen: [(7, 3)],
-            King: [(7, 4)],
-            Pawn: [(6, col) for col in range(8)]
-        }
-        for piece_class, positions in white_positions.items():
-            for position in positions:
-                piece_image = self.get_piece_image(piece_class.__name__.lower(), 'white')
-                pieces.append(piece_class(self.screen, piece_image, 'white', position))
-        # black piece init
-        for piece_class, positions in black_positions.items():
-            for position in positions:
-                piece_image = self.get_piece_image(piece_class.__name__.lower(), 'black')
-                pieces.append(piece_class(self.screen, piece_image, 'black', position))
-        return pieces
+        super().__init__()
 
     def get_piece_image(self, piece_name, color):
-        row = 0 if color == 'white' else 1
-        # changed black to white for correct invertion.
-        col = {
-            'king': 1,
-            'queen': 0,
-            'rook': 2,
-            'knight': 3,
-            'bishop': 4,
-            'pawn': 5
-        }[piece_name]
-        return self.pieces_image.subsurface(
-            col * self.piece_size, row * self.piece_size, self.piece_size, self.piece_size
-        )
+        return self.sprite_atlas.get(piece_name, color)
 
     def construct_board(self):
+        self.screen.blit(self.get_board_layer(), (self.board_offset_x - self.border_width,
+                                                  self.board_offset_y - self.border_width))
+
+    def get_board_layer(self):
+        # The squares and border never change, so they are drawn once per tile size
+        layer = self.board_layers.get(self.tile_size)
+        if layer is None:
+            layer = self.render_board_layer()
+            self.board_layers[self.tile_size] = layer
+        return layer
+
+    def render_board_layer(self):
+        border_width = self.border_width
+        size = self.tile_size * 8 + border_width * 2
+        layer = pygame.Surface((size, size)).convert()
         for row in range(8):
             for col in range(8):
-                x = self.board_offset_x + col * self.tile_size
-                y = self.board_offset_y + row * self.tile_size
+                x = border_width + col * self.tile_size
+                y = border_width + row * self.tile_size
                 color = self.dark_color
                 if (row + col) % 2 == 0:
                     color = self.light_color
-                pygame.draw.rect(self.screen, color, (x, y, self.tile_size, self.tile_size))
+                pygame.draw.rect(layer, color, (x, y, self.tile_size, self.tile_size))
 
         border_color = (0, 0, 0)
-        border_width = 2
-        pygame.draw.rect(self.screen, border_color, 
-            (self.board_offset_x - border_width,
-            self.board_offset_y - border_width,
-            self.tile_size * 8 + border_width * 2,
-            self.tile_size * 8 + border_width * 2),
-            border_width)
+        pygame.draw.rect(layer, border_color, (0, 0, size, size), border_width)
+        return layer
 
     def draw_pieces(self):
         for piece in self.pieces:
@@ -93,24 +68,6 @@ class ChessBoard:
                     pygame.draw.rect(self.screen, (255, 0, 0), 
                                 (x, y, self.tile_size, self.tile_size), 2)
 
-    def get_piece_at(self, position):
-        for piece in self.pieces:
-            if piece.position == position:
-                return piece
-        return None
-
-    def move_piece(self, piece, new_position):
-        if piece and piece.move(new_position, self):
-            return True
-        return False
-    
-    def is_empty_square(self, row, col):
-        return self.get_piece_at((row, col)) is None
-
-    def is_opponent_piece(self, row, col, current_color):
-        piece = self.get_piece_at((row, col))
-        return piece is not None and piece.color != current_color
-    
     def draw_possible_moves(self, piece):
         if piece:
             possible_moves = piece.get_possible_moves(self)
@@ -128,24 +85,8 @@ class ChessBoard:
         tile_y = (position[1] - self.board_offset_y) // self.tile_size
         return (tile_y, tile_x)
     
-    def get_pieces_by_color(self, color):
-        return [piece for piece in self.pieces if piece.color == color]
-    
-    def find_king(self, color):
-        for piece in self.pieces:
-            if isinstance(piece, King) and piece.color == color:
-                return piece
-        return None
-
     def create_piece(self, piece_type, color, position):
-        piece_classes = {
-            'rook': Rook,
-            'knight': Knight,
-            'bishop': Bishop,
-            'queen': Queen,
-            'king': King,
-            'pawn': Pawn
-        }
-        piece_class = piece_classes[piece_type]
-        piece_image = self.get_piece_image(piece_type, color)
-        return piece_class(self.screen, piece_image, color, position)
+        piece = super().create_piece(piece_type, color, position)
+        piece.screen = self.screen
+        piece.image = self.get_piece_image(piece_type, color)
+        return piece
@@ -1,4 +1,29 @@
-from .piece import King
+from .bitboard import BitboardPosition, position_of, iter_bits
+
+CHECKMATE = "Checkmate!"
+STALEMATE = "Stalemate!"
+
+
+class GameStatus:
+    """Legal moves, check and result of one position, worked out once per move"""
+
+    def __init__(self, version, color, legal_moves, in_check, checkers):
+        # BoardState.version the status was worked out for
+        self.version = version
+        self.color = color
+        # {(row, col) of a piece of color: [destinations]}, only pieces that can move
+        self.legal_moves = legal_moves
+        self.in_check = in_check
+        # Pieces of the other side giving check
+        self.checkers = checkers
+        if legal_moves:
+            self.result = None
+        else:
+            self.result = CHECKMATE if in_check else STALEMATE
+
+    def moves_for(self, piece):
+        return self.legal_moves.get(piece.position, [])
+
 
 class GameRules:
     def __init__(self, board):
@@ -6,71 +31,54 @@ class GameRules:
         self.current_turn = 'black'
         #invert colours
         self.move_history = []
+        # Latest GameStatus per color, reused until the board version changes
+        self.statuses = {}
 
     def switch_turn(self):
         self.current_turn = 'black' if self.current_turn == 'white' else 'white'
 
-    def is_in_check(self, color):
-        
-        king = next((piece for piece in self.board.pieces if isinstance(piece, King) and piece.color == color), None)
-        if not king:
-            return False
+    def get_status(self, color=None):
+        """GameStatus of the board with color (default: the side to move) to move"""
+        if color is None:
+            color = self.current_turn
+        status = self.statuses.get(color)
+        if status is None or status.version != self.board.version:
+            status = self.compute_status(color)
+            self.statuses[color] = status
+        return status
 
-        king_pos = king.position
-        opponent_pieces = [p for p in self.board.pieces if p.color != color]
+    def compute_status(self, color):
+        position = BitboardPosition.from_board(self.board, color)
+        legality = position.legality_info()
+        in_check = legality[0]
+        legal_moves = {}
+        for move in position.generate_moves():
+            if position.is_legal(move, legality):
+                legal_moves.setdefault(position_of(move & 63), []).append(position_of(move >> 6))
+        checkers = []
+        if in_check:
+            king_square = position.king_square(position.side_to_move)
+            for square in iter_bits(position.attackers(king_square, position.side_to_move ^ 1)):
+                checkers.append(self.board.get_piece_at(position_of(square)))
+        return GameStatus(self.board.version, color, legal_moves, in_check, checkers)
 
-        for piece in opponent_pieces:
-            if king_pos in piece.get_possible_moves(self.board):
-                return True
-        return False
+    def is_in_check(self, color):
+        return self.get_status(color).in_check
 
     def is_move_legal(self, piece, destination):
-        initial_position = piece.position
-        target_piece = self.board.get_piece_at(destination)
-        
-        piece.position = destination
-        if target_piece:
-            self.board.pieces.remove(target_piece)
-        
-        in_check = self.is_in_check(piece.color)
-        
-        piece.position = initial_position
-        if target_piece:
-            self.board.pieces.append(target_piece)
-        
-        return not in_check
-
-    def is_checkmate(self, color):
-        if not self.is_in_check(color):
+        row, col = destination
+        if not (0 <= row < 8 and 0 <= col < 8):
             return False
+        return destination in self.get_status(piece.color).moves_for(piece)
 
-        pieces = [p for p in self.board.pieces if p.color == color]
-        for piece in pieces:
-            possible_moves = piece.get_possible_moves(self.board)
-            for move in possible_moves:
-                if self.is_move_legal(piece, move):
-                    return False 
-        return True
+    def is_checkmate(self, color):
+        return self.get_status(color).result == CHECKMATE
 
     def is_stalemate(self, color):
-        if self.is_in_check(color):
-            return False
-
-        pieces = [p for p in self.board.pieces if p.color == color]
-        for piece in pieces:
-            possible_moves = piece.get_possible_moves(self.board)
-            for move in possible_moves:
-                if self.is_move_legal(piece, move):
-                    return False 
-        return True
+        return self.get_status(color).result == STALEMATE
 
     def is_game_over(self):
-        if self.is_checkmate(self.current_turn):
-            # return f"Checkmate! {self.current_turn} wins."
-            return f"Checkmate!"
-        elif self.is_stalemate(self.current_turn):
-            return "Stalemate!"
-        return None
+        return self.get_status().result
     
     def position_to_notation(self, pos):
         column = chr(pos[1] + ord('a'))  # 'a' to 'h'
@@ -0,0 +1,94 @@
+"""Move ordering for ChessAI alpha-beta search.
+
+Moves are tried in this order: the transposition table move, captures by
+MVV-LVA (most valuable victim, least valuable attacker), the two killer moves
+of the current ply, then quiet moves by their history score.  The cutoff
+counters show how often the first move tried already refuted the node, which
+is the best single measure of ordering quality.
+"""
+
+from .bitboard import PAWN, QUEEN, PIECE_NAMES, PROMOTION_ROW
+
+MAX_PLY = 128
+
+TT_MOVE_SCORE = 4000000
+CAPTURE_SCORE = 3000000
+KILLER_SCORES = (2000000, 1900000)
+# History scores are halved between searches and capped below the killers
+HISTORY_LIMIT = 1000000
+
+
+class MoveOrderer:
+    def __init__(self, piece_values):
+        values = [piece_values[name] for name in PIECE_NAMES]
+        self.piece_values = values
+        # mvv_lva[victim][attacker]
+        self.mvv_lva = [[CAPTURE_SCORE + victim * 10 - attacker // 10 for attacker in values] for victim in values]
+        self.promotion_score = CAPTURE_SCORE + values[QUEEN] * 10
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [[0] * 4096 for _ in range(2)]
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def new_search(self):
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        for table in self.history:
+            for index in range(4096):
+                table[index] >>= 1
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def is_quiet(self, position, move):
+        to_square = move >> 6
+        if position.mailbox[to_square] is not None:
+            return False
+        piece = position.mailbox[move & 63]
+        return not (piece[1] == PAWN and to_square >> 3 == PROMOTION_ROW[piece[0]])
+
+    def order(self, position, moves, ply, tt_move=None):
+        """Return moves sorted best-first for the side to move"""
+        mailbox = position.mailbox
+        history = self.history[position.side_to_move]
+        killers = self.killers[ply] if ply < MAX_PLY else (None, None)
+        mvv_lva = self.mvv_lva
+        scored = []
+        for move in moves:
+            if move == tt_move:
+                score = TT_MOVE_SCORE
+            else:
+                to_square = move >> 6
+                victim = mailbox[to_square]
+                color, attacker = mailbox[move & 63]
+                if victim is not None:
+                    score = mvv_lva[victim[1]][attacker]
+                elif attacker == PAWN and to_square >> 3 == PROMOTION_ROW[color]:
+                    score = self.promotion_score
+                elif move == killers[0]:
+                    score = KILLER_SCORES[0]
+                elif move == killers[1]:
+                    score = KILLER_SCORES[1]
+                else:
+                    score = history[move]
+            scored.append((score, move))
+        scored.sort(reverse=True)
+        return [move for _, move in scored]
+
+    def record_cutoff(self, position, move, ply, depth, move_number):
+        """Update statistics, killers and history after move caused a beta cutoff"""
+        self.cutoffs += 1
+        if move_number == 0:
+            self.first_move_cutoffs += 1
+        if not self.is_quiet(position, move):
+            return
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        history = self.history[position.side_to_move]
+        history[move] = min(history[move] + depth * depth, HISTORY_LIMIT)
+
+    def first_move_cutoff_rate(self):
+        if not self.cutoffs:
+            return 0.0
+        return self.first_move_cutoffs / self.cutoffs
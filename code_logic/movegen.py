@@ -0,0 +1,133 @@
+"""Move generation tables shared by Piece and BitboardPosition.
+
+Everything here is built once at import time.  Squares are indexed
+``row * 8 + col``.  Each table comes in two forms: lists of destination
+squares, walked by Piece over ChessBoard.squares, and bitmasks, combined
+by BitboardPosition with its occupancy masks.
+"""
+
+WHITE, BLACK = 0, 1
+
+KNIGHT_OFFSETS = [(-2, 1), (-1, 2), (1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1)]
+KING_OFFSETS = [(-1, -1), (-1, 1), (1, -1), (1, 1), (0, 1), (1, 0), (-1, 0), (0, -1)]
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+PAWN_CAPTURE_OFFSETS = ([(1, -1), (1, 1)], [(-1, -1), (-1, 1)])
+# A pawn may advance two squares from this row, whatever it did before
+PAWN_START_ROW = (1, 6)
+
+# The (row, col) tuple of every square, so callers never build new ones
+SQUARE_POSITIONS = [(square >> 3, square & 7) for square in range(64)]
+
+
+def _on_board(row, col):
+    return 0 <= row < 8 and 0 <= col < 8
+
+
+def _leaper_targets(offsets):
+    targets = []
+    for row, col in SQUARE_POSITIONS:
+        targets.append(tuple(
+            (row + row_step) * 8 + col + col_step
+            for row_step, col_step in offsets
+            if _on_board(row + row_step, col + col_step)
+        ))
+    return targets
+
+
+def _ray_targets(row_step, col_step):
+    rays = []
+    for row, col in SQUARE_POSITIONS:
+        ray = []
+        new_row, new_col = row + row_step, col + col_step
+        while _on_board(new_row, new_col):
+            ray.append(new_row * 8 + new_col)
+            new_row += row_step
+            new_col += col_step
+        rays.append(tuple(ray))
+    return rays
+
+
+def _to_masks(targets):
+    masks = []
+    for squares in targets:
+        mask = 0
+        for square in squares:
+            mask |= 1 << square
+        masks.append(mask)
+    return masks
+
+
+KNIGHT_TARGETS = _leaper_targets(KNIGHT_OFFSETS)
+KING_TARGETS = _leaper_targets(KING_OFFSETS)
+# Squares attacked by a pawn of the given colour standing on a square
+PAWN_CAPTURE_TARGETS = tuple(_leaper_targets(offsets) for offsets in PAWN_CAPTURE_OFFSETS)
+# The square one step ahead of a pawn, or None on the last row
+PAWN_PUSH_TARGETS = tuple(
+    [square + step if 0 <= square + step < 64 else None for square in range(64)]
+    for step in (8, -8)
+)
+
+# RAY_TARGETS[direction][square] lists the squares from square to the edge
+RAY_TARGETS = {direction: _ray_targets(*direction) for direction in ROOK_DIRECTIONS + BISHOP_DIRECTIONS}
+SLIDER_RAYS = {
+    'rook': [RAY_TARGETS[direction] for direction in ROOK_DIRECTIONS],
+    'bishop': [RAY_TARGETS[direction] for direction in BISHOP_DIRECTIONS],
+    'queen': [RAY_TARGETS[direction] for direction in BISHOP_DIRECTIONS + ROOK_DIRECTIONS],
+}
+LEAPER_TARGETS = {'knight': KNIGHT_TARGETS, 'king': KING_TARGETS}
+
+KNIGHT_ATTACKS = _to_masks(KNIGHT_TARGETS)
+KING_ATTACKS = _to_masks(KING_TARGETS)
+PAWN_ATTACKS = tuple(_to_masks(targets) for targets in PAWN_CAPTURE_TARGETS)
+
+# Rays that run towards higher square indices find their first blocker with the
+# lowest set bit, the others with the highest set bit.
+POSITIVE_ORTHOGONAL = (_to_masks(RAY_TARGETS[(1, 0)]), _to_masks(RAY_TARGETS[(0, 1)]))
+NEGATIVE_ORTHOGONAL = (_to_masks(RAY_TARGETS[(-1, 0)]), _to_masks(RAY_TARGETS[(0, -1)]))
+POSITIVE_DIAGONAL = (_to_masks(RAY_TARGETS[(1, 1)]), _to_masks(RAY_TARGETS[(1, -1)]))
+NEGATIVE_DIAGONAL = (_to_masks(RAY_TARGETS[(-1, -1)]), _to_masks(RAY_TARGETS[(-1, 1)]))
+ORTHOGONAL_RAYS = tuple((rays, True) for rays in POSITIVE_ORTHOGONAL) + tuple((rays, False) for rays in NEGATIVE_ORTHOGONAL)
+DIAGONAL_RAYS = tuple((rays, True) for rays in POSITIVE_DIAGONAL) + tuple((rays, False) for rays in NEGATIVE_DIAGONAL)
+
+
+def rook_attacks(square, occupied):
+    attacks = 0
+    for rays in POSITIVE_ORTHOGONAL:
+        ray = rays[square]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in NEGATIVE_ORTHOGONAL:
+        ray = rays[square]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def bishop_attacks(square, occupied):
+    attacks = 0
+    for rays in POSITIVE_DIAGONAL:
+        ray = rays[square]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in NEGATIVE_DIAGONAL:
+        ray = rays[square]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def append_moves(moves, from_square, targets):
+    """Append a packed move from from_square to every square set in targets"""
+    while targets:
+        low_bit = targets & -targets
+        moves.append(from_square | ((low_bit.bit_length() - 1) << 6))
+        targets ^= low_bit
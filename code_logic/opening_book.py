@@ -0,0 +1,210 @@
+"""Binary opening book for ChessAI.
+
+The book is a header followed by fixed-width entries (Zobrist key, move,
+weight) sorted by key, so a lookup is a binary search over the file through
+mmap and never loads it into memory.  Weights count how often a move was
+played from the position in the source games.
+
+Every position is stored twice: as played, and mirrored with the colours
+swapped.  The game screen starts with the black pieces to move, which is the
+mirror of a standard game, so one book serves PGN games and our own games.
+"""
+
+import glob
+import mmap
+import os
+import pickle
+import random
+import re
+import struct
+
+from .bitboard import (BitboardPosition, START_FEN, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+                       mirror_move, parse_square)
+
+BOOK_MAGIC = b'MCBOOK01'
+ENTRY = struct.Struct('<QHH')
+# Moves beyond this many plies are not worth storing
+BOOK_PLIES = 16
+MAX_WEIGHT = 0xFFFF
+
+SAN_PIECES = {'N': KNIGHT, 'B': BISHOP, 'R': ROOK, 'Q': QUEEN, 'K': KING}
+SAN_MOVE = re.compile(r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$')
+PGN_NOISE = re.compile(r'\{[^}]*\}|;[^\n]*|\$\d+|\d+\.(?:\.\.)?|1-0|0-1|1/2-1/2|\*')
+
+
+class OpeningBook:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap cannot map an empty file
+            self.file.close()
+            raise ValueError(f"{path} is not an opening book")
+        if self.map[:len(BOOK_MAGIC)] != BOOK_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an opening book")
+        self.entry_count = (len(self.map) - len(BOOK_MAGIC)) // ENTRY.size
+
+    def key_at(self, index):
+        return ENTRY.unpack_from(self.map, len(BOOK_MAGIC) + index * ENTRY.size)[0]
+
+    def probe(self, key):
+        """Return [(move, weight), ...] stored for key"""
+        low, high = 0, self.entry_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        moves = []
+        for index in range(low, self.entry_count):
+            entry_key, move, weight = ENTRY.unpack_from(self.map, len(BOOK_MAGIC) + index * ENTRY.size)
+            if entry_key != key:
+                break
+            moves.append((move, weight))
+        return moves
+
+    def choose_move(self, position, rng=random):
+        """A legal book move for position picked by weight, or None"""
+        moves = self.probe(position.zobrist_key)
+        if not moves:
+            return None
+        legal_moves = position.legal_moves()
+        # A key collision with another position would give moves that are not legal here
+        moves = [(move, weight) for move, weight in moves if move in legal_moves]
+        if not moves:
+            return None
+        return rng.choices([move for move, _ in moves], weights=[weight for _, weight in moves])[0]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def open_book(path):
+    """OpeningBook for path, or None when there is no usable book there"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return OpeningBook(path)
+    except (OSError, ValueError):
+        return None
+
+
+def add_game(counts, moves, start=None, max_plies=BOOK_PLIES):
+    """Count the first max_plies moves of a game in counts[key][move], both orientations
+
+    Stops at the first illegal move.  Returns the number of moves counted.
+    """
+    position = start if start is not None else BitboardPosition.from_fen(START_FEN)
+    mirror = position.mirrored()
+    for ply, move in enumerate(moves[:max_plies]):
+        if move not in position.legal_moves():
+            return ply
+        for book_position, book_move in ((position, move), (mirror, mirror_move(move))):
+            moves_here = counts.setdefault(book_position.zobrist_key, {})
+            moves_here[book_move] = moves_here.get(book_move, 0) + 1
+            book_position.make_move(book_move)
+    return min(len(moves), max_plies)
+
+
+def write_book(path, counts):
+    """Write counts from add_game as a sorted book file; returns the number of entries"""
+    entries = sorted(
+        (key, move, min(weight, MAX_WEIGHT))
+        for key, moves in counts.items()
+        for move, weight in moves.items()
+    )
+    with open(path, 'wb') as book_file:
+        book_file.write(BOOK_MAGIC)
+        for entry in entries:
+            book_file.write(ENTRY.pack(*entry))
+    return len(entries)
+
+
+def san_to_move(position, san):
+    """Packed move for a SAN move in position, or None when it cannot be played under our rules"""
+    match = SAN_MOVE.match(san.rstrip('+#!?'))
+    if match is None:
+        # Castling, among others, has no equivalent here
+        return None
+    piece, from_file, from_rank, target, promotion = match.groups()
+    piece_type = SAN_PIECES[piece] if piece else PAWN
+    if promotion is not None and promotion != 'Q':
+        return None
+    to_square = parse_square(target)
+    for move in position.legal_moves():
+        from_square = move & 63
+        if (move >> 6 == to_square
+                and position.mailbox[from_square][1] == piece_type
+                and (from_file is None or 'abcdefgh'[from_square & 7] == from_file)
+                and (from_rank is None or str((from_square >> 3) + 1) == from_rank)):
+            return move
+    return None
+
+
+def read_pgn_games(text):
+    """Yield the SAN moves of each game in a PGN text, without comments or variations"""
+    for game in re.split(r'\n\s*\n(?=\[)', text):
+        movetext = '\n'.join(line for line in game.splitlines() if not line.startswith('['))
+        movetext = PGN_NOISE.sub(' ', movetext)
+        # Drop variations, innermost first
+        while '(' in movetext:
+            reduced = re.sub(r'\([^()]*\)', ' ', movetext)
+            if reduced == movetext:
+                break
+            movetext = reduced
+        tokens = movetext.split()
+        if tokens:
+            yield tokens
+
+
+def pgn_moves(san_moves, max_plies=BOOK_PLIES):
+    """Packed moves for SAN moves from the start position, up to the first unplayable one"""
+    position = BitboardPosition.from_fen(START_FEN)
+    moves = []
+    for san in san_moves[:max_plies]:
+        move = san_to_move(position, san)
+        if move is None:
+            break
+        moves.append(move)
+        position.make_move(move)
+    return moves
+
+
+def saved_game_moves(path):
+    """Packed moves of a game saved by SaveManager, which start from the game screen's start position"""
+    with open(path, 'rb') as saved_file:
+        game_state = pickle.load(saved_file)
+    moves = []
+    for move in game_state.get('move_history', []):
+        # The move list names rows from the top of the screen
+        from_square = parse_square(move['from'][0] + str(9 - int(move['from'][1])))
+        to_square = parse_square(move['to'][0] + str(9 - int(move['to'][1])))
+        moves.append(from_square | to_square << 6)
+    return moves
+
+
+def build_book(path, pgn_paths=(), saved_game_directory=None, max_plies=BOOK_PLIES):
+    """Build a book from PGN files and SaveManager saves; returns (games, entries)"""
+    counts = {}
+    games = 0
+    for pgn_path in pgn_paths:
+        with open(pgn_path, encoding='utf-8', errors='replace') as pgn_file:
+            text = pgn_file.read()
+        for san_moves in read_pgn_games(text):
+            if add_game(counts, pgn_moves(san_moves, max_plies), max_plies=max_plies):
+                games += 1
+    if saved_game_directory is not None:
+        for saved_path in sorted(glob.glob(os.path.join(saved_game_directory, '*.pkl'))):
+            try:
+                moves = saved_game_moves(saved_path)
+            except (OSError, pickle.UnpicklingError, KeyError, ValueError, IndexError):
+                continue
+            game_start = BitboardPosition.from_fen(START_FEN).mirrored()
+            if add_game(counts, moves, game_start, max_plies):
+                games += 1
+    return games, write_book(path, counts)
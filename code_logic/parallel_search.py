@@ -0,0 +1,238 @@
+"""Multi-process search for ChessAI: root splitting and Lazy SMP.
+
+The root moves are split across a ProcessPoolExecutor.  Each worker process
+keeps its own ChessAI (and transposition table) between tasks and receives
+the position in the compact form of BitboardPosition.to_compact().
+
+The first root move is searched alone to get a score; the other moves are
+then handed out with a bound one point below (or above) the best score
+returned so far, so workers can cut off moves that cannot win.  A move that
+ties the best score is still searched exactly, which keeps the merge
+deterministic: the best score wins, and ties go to the earliest move in
+root order, whatever order the workers finish in.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+
+from .bitboard import BitboardPosition, WHITE
+from .transposition import SharedTranspositionTable, attach_shared_memory
+
+_worker_ai = None
+# Seconds between checks of the stop signal and deadline while waiting on workers
+STOP_POLL_INTERVAL = 0.05
+
+
+def _init_worker(tt_size_mb, options, flag_name):
+    global _worker_ai
+    from .chess_ai import ChessAI
+    _worker_ai = ChessAI(None, None, tt_size_mb=tt_size_mb, book_path=None)
+    # Set by the parent to abort root moves that are already running
+    _worker_ai.stop_signal = SharedFlag(flag_name)
+    for name, value in options.items():
+        setattr(_worker_ai, name, value)
+
+
+def _search_root_move(compact_position, move, depth, alpha, beta, deadline):
+    """Search one root move in a worker; returns (score or None on timeout, nodes)"""
+    from .chess_ai import SearchTimeout
+
+    ai = _worker_ai
+    position = BitboardPosition.from_compact(compact_position, ai.square_values)
+    maximizing = position.side_to_move == WHITE
+    ai.positions_evaluated = 0
+    ai.deadline = deadline
+    position.make_move(move)
+    try:
+        value = ai.minimax_virtual(position, depth - 1, alpha, beta, not maximizing)
+    except SearchTimeout:
+        value = None
+    finally:
+        ai.deadline = None
+    return value, ai.positions_evaluated
+
+
+def create_executor(workers, tt_size_mb, options, stop_flag):
+    """Process pool whose workers search with the given ChessAI.search_options()
+
+    The workers stop their search when stop_flag (a SharedFlag) is set.
+    """
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(tt_size_mb, options, stop_flag.name))
+
+
+def search_root_parallel(ai, executor, virtual_board, moves, depth, infinity, stop_flag):
+    """Search legal root moves (best first) across the executor; returns (score, move)
+
+    Raises ai's SearchTimeout when a worker runs out of time, or when ai's
+    stop_signal is set or its deadline passes while waiting on the workers,
+    so the caller keeps the previous iteration's result.
+    """
+    from .chess_ai import SearchTimeout
+
+    compact_position = virtual_board.to_compact()
+    maximizing = virtual_board.side_to_move == WHITE
+    best_value = None
+    best_index = None
+    pending = {}
+    next_index = 0
+    stop_flag.clear()
+
+    def submit(index):
+        if best_value is None:
+            alpha, beta = -infinity, infinity
+        elif maximizing:
+            alpha, beta = best_value - 1, infinity
+        else:
+            alpha, beta = -infinity, best_value + 1
+        future = executor.submit(_search_root_move, compact_position, moves[index], depth, alpha, beta, ai.deadline)
+        pending[future] = index
+
+    try:
+        while next_index < len(moves) or pending:
+            # The first move runs alone so that the others get a bound
+            while next_index < len(moves) and len(pending) < ai.workers and (best_value is not None or not pending):
+                submit(next_index)
+                next_index += 1
+            done, _ = wait(pending, timeout=STOP_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            if ai.stop_signal is not None and ai.stop_signal.is_set():
+                raise SearchTimeout()
+            if ai.deadline is not None and time.time() >= ai.deadline:
+                raise SearchTimeout()
+            for future in done:
+                index = pending.pop(future)
+                value, nodes = future.result()
+                ai.positions_evaluated += nodes
+                if value is None:
+                    raise SearchTimeout()
+                if (best_value is None
+                        or (value > best_value if maximizing else value < best_value)
+                        or (value == best_value and index < best_index)):
+                    best_value, best_index = value, index
+    finally:
+        if pending:
+            # Abort the moves still being searched and wait for them, so the
+            # workers are idle before the next search clears the flag
+            stop_flag.set()
+            for future in pending:
+                future.cancel()
+            wait(pending)
+
+    if best_index is None:
+        return best_value, None
+    return best_value, moves[best_index]
+
+
+# Lazy SMP: helper processes search the same root position at staggered
+# depths while the main process searches normally.  Nothing is split; the
+# helpers only fill the shared transposition table, which lets the main
+# search cut off or order moves from work it never did itself.
+#
+# That makes Lazy SMP nondeterministic: which helper entries the main search
+# meets depends on process timing, and entries from the depth + 1 helpers or
+# from other windows can change its score and move at a fixed depth.  Repeated
+# searches of one position may therefore disagree with each other and with
+# the single-process search; benchmark.py reports where they do.
+
+class SharedFlag:
+    """A stop flag in a one-byte shared memory block"""
+
+    def __init__(self, name=None):
+        if name is None:
+            self.shared_memory = shared_memory.SharedMemory(create=True, size=1)
+            self.owner = True
+        else:
+            self.shared_memory = attach_shared_memory(name)
+            self.owner = False
+        self.name = self.shared_memory.name
+
+    def set(self):
+        self.shared_memory.buf[0] = 1
+
+    def clear(self):
+        self.shared_memory.buf[0] = 0
+
+    def is_set(self):
+        return self.shared_memory.buf[0] == 1
+
+    def close(self):
+        self.shared_memory.close()
+        if self.owner:
+            self.shared_memory.unlink()
+
+
+_helper_ai = None
+
+
+def _init_helper(tt_name, tt_size_mb, flag_name, seed, options):
+    global _helper_ai
+    import os
+    import random
+    from .chess_ai import ChessAI
+
+    ai = ChessAI(None, None, tt_size_mb=0, book_path=None)
+    ai.transposition_table = SharedTranspositionTable(tt_size_mb, name=tt_name)
+    ai.stop_signal = SharedFlag(flag_name)
+    for name, value in options.items():
+        setattr(ai, name, value)
+    # Different quiet-move orders make the helpers explore different parts of the tree
+    rng = random.Random(seed ^ os.getpid())
+    for table in ai.move_orderer.history:
+        for index in range(len(table)):
+            table[index] = rng.randrange(64)
+    _helper_ai = ai
+
+
+def _helper_search(compact_position, depth, age, deadline):
+    """Search the root position to depth, filling the shared table; returns nodes searched"""
+    from .chess_ai import SearchTimeout
+
+    ai = _helper_ai
+    ai.transposition_table.age = age
+    ai.positions_evaluated = 0
+    ai.deadline = deadline
+    position = BitboardPosition.from_compact(compact_position, ai.square_values)
+    try:
+        ai.search_root(position, depth, None)
+    except SearchTimeout:
+        pass
+    finally:
+        ai.deadline = None
+    return ai.positions_evaluated
+
+
+class LazySMP:
+    """Shared table, stop flag and helper pool for one ChessAI"""
+
+    def __init__(self, helpers, tt_size_mb, options):
+        self.helpers = helpers
+        self.transposition_table = SharedTranspositionTable(tt_size_mb)
+        self.stop_flag = SharedFlag()
+        self.executor = ProcessPoolExecutor(
+            max_workers=helpers, initializer=_init_helper,
+            initargs=(self.transposition_table.name, tt_size_mb, self.stop_flag.name, helpers, options))
+
+    def search_root(self, ai, virtual_board, depth, previous_best, alpha, beta):
+        """Run ai.search_root in this process while the helpers search depth and depth + 1
+
+        The result may differ from run to run; see the note above SharedFlag.
+        """
+        compact_position = virtual_board.to_compact()
+        self.stop_flag.clear()
+        futures = [
+            self.executor.submit(_helper_search, compact_position, depth + (index & 1),
+                                 self.transposition_table.age, ai.deadline)
+            for index in range(self.helpers)
+        ]
+        try:
+            return ai.search_root(virtual_board, depth, previous_best, alpha, beta)
+        finally:
+            self.stop_flag.set()
+            for future in futures:
+                ai.positions_evaluated += future.result()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+        self.stop_flag.close()
+        self.transposition_table.close(unlink=True)
@@ -1,9 +1,11 @@
-import pygame
+from .movegen import (SLIDER_RAYS, LEAPER_TARGETS, PAWN_PUSH_TARGETS, PAWN_CAPTURE_TARGETS, PAWN_START_ROW,
+                      SQUARE_POSITIONS)
 
 #base class for chess pieces
 class Piece:
     
     def __init__(self, screen, image, color, position):
+        # screen and image are None on a headless BoardState; only ChessBoard draws
         self.screen = screen
         self.image = image
         self.color = color
@@ -19,10 +21,9 @@ class Piece:
         if self.is_valid_move(new_position, board):
             target_piece = board.get_piece_at(new_position)
             if target_piece:
-                board.pieces.remove(target_piece)
+                board.remove_piece(target_piece)
 
-            self.position = new_position
-            self.moved_once = True
+            board.place_piece(self, new_position)
 
             if isinstance(self, Pawn):  ## Check if the piece is a pawn
                 self.check_promotion(new_position, board)   
@@ -44,43 +45,25 @@ class Piece:
     def get_possible_moves(self, board):
         possible_moves = []
         current_row, current_col = self.position
-
-        movement_patterns = {
-            'rook': [(-1, 0), (1, 0), (0, -1), (0, 1)],
-            'knight': [(-2, 1), (-1, 2), (1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1)],
-            'bishop': [(-1, -1), (-1, 1), (1, -1), (1, 1)],
-            'queen': [(-1, -1), (-1, 1), (1, -1), (1, 1), (0, 1), (1, 0), (-1, 0), (0, -1)],
-            'king': [(-1, -1), (-1, 1), (1, -1), (1, 1), (0, 1), (1, 0), (-1, 0), (0, -1)],
-            'pawn': [(1, 0)]
-        }
-
-        for direction in movement_patterns[self.type]:
-            possible_moves.extend(self.get_moves_in_direction(board, current_row, current_col, direction))
-
-        return possible_moves
-    
-    def get_moves_in_direction(self, board, row, col, direction):
-        moves = []
-        row_increase, col_increase = direction
-        new_row, new_col = row + row_increase, col + col_increase
-
-        if self.type in ['rook', 'bishop', 'queen']:
-            while 0 <= new_row < 8 and 0 <= new_col < 8:
-                if board.is_empty_square(new_row, new_col) or board.is_opponent_piece(new_row, new_col, self.color):
-                    moves.append((new_row, new_col))
-                    if board.is_opponent_piece(new_row, new_col, self.color):
-                        break  # Stop checking after capturing
-                else:
-                    break  # blocked by friendly piece
-
-                new_row += row_increase
-                new_col += col_increase
+        square = current_row * 8 + current_col
+        squares = board.squares
+
+        if self.type in SLIDER_RAYS:
+            for rays in SLIDER_RAYS[self.type]:
+                for target in rays[square]:
+                    occupant = squares[target]
+                    if occupant is not None:
+                        if occupant.color != self.color:
+                            possible_moves.append(SQUARE_POSITIONS[target])
+                        break  # Stop checking after capturing or when blocked by a friendly piece
+                    possible_moves.append(SQUARE_POSITIONS[target])
         else:
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
-                if board.is_empty_square(new_row, new_col) or board.is_opponent_piece(new_row, new_col, self.color):
-                    moves.append((new_row, new_col))
+            for target in LEAPER_TARGETS[self.type][square]:
+                occupant = squares[target]
+                if occupant is None or occupant.color != self.color:
+                    possible_moves.append(SQUARE_POSITIONS[target])
 
-        return moves
+        return possible_moves
 
 class Rook(Piece):
     pass
@@ -100,41 +83,34 @@ class King(Piece):
 class Pawn(Piece):
     def __init__(self, screen, image, color, position):
         super().__init__(screen, image, color, position)
-        self.moved_once = False
         self.direction = 1 if color == 'white' else -1
             
     def get_possible_moves(self, board):
         possible_moves = []
         current_row, current_col = self.position
-        new_row = current_row + self.direction
-        if 0 <= new_row < 8:
-            
-            if not board.get_piece_at((new_row, current_col)):
-                possible_moves.append((new_row, current_col))
-                
-                if not self.moved_once:
-                    second_row_ahead =  current_row + (2 * self.direction)               
-                    if (0 <= second_row_ahead < 8 and not board.get_piece_at((second_row_ahead, current_col))):
-                        possible_moves.append((second_row_ahead, current_col)) 
-                                 
-        capture_squares = [
-            (new_row, current_col - 1),
-            (new_row, current_col + 1)
-        ]        
-        
-        for capture_square in capture_squares:
-            c_row, c_col = capture_square
-            if 0 <= c_row < 8 and 0 <= c_col < 8:
-                target_piece = board.get_piece_at((capture_square))
-                if target_piece and target_piece.color != self.color:
-                    possible_moves.append(capture_square)
+        square = current_row * 8 + current_col
+        squares = board.squares
+        color_index = 0 if self.color == 'white' else 1
+
+        target = PAWN_PUSH_TARGETS[color_index][square]
+        if target is not None and squares[target] is None:
+            possible_moves.append(SQUARE_POSITIONS[target])
+
+            if current_row == PAWN_START_ROW[color_index]:
+                second_target = PAWN_PUSH_TARGETS[color_index][target]
+                if second_target is not None and squares[second_target] is None:
+                    possible_moves.append(SQUARE_POSITIONS[second_target])
+
+        for target in PAWN_CAPTURE_TARGETS[color_index][square]:
+            target_piece = squares[target]
+            if target_piece and target_piece.color != self.color:
+                possible_moves.append(SQUARE_POSITIONS[target])
                     
         return possible_moves
     
     def promote(self, board):
-        board.pieces.remove(self)
+        board.remove_piece(self)
         
-        queen_image = board.get_piece_image('queen', self.color)
-        new_queen = Queen(self.screen, queen_image, self.color, self.position)
-        board.pieces.append(new_queen)
+        new_queen = board.create_piece('queen', self.color, self.position)
+        board.add_piece(new_queen)
      
\ No newline at end of file
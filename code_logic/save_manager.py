@@ -103,10 +103,10 @@ class SaveManager:
                 game_state = pickle.load(f)
             
             # Restore game state
-            chess_board.pieces = [
+            chess_board.set_pieces([
                 chess_board.create_piece(piece_type, color, position)
                 for piece_type, color, position in game_state['board']
-            ]
+            ])
             game_rules.current_turn = game_state['current_turn']
             game_rules.move_history = game_state.get('move_history', [])
             
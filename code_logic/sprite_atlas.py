@@ -0,0 +1,58 @@
+"""Piece sprites sliced from the sprite sheet and scaled to the tile size.
+
+Each sprite is cut, smooth-scaled and converted to the display's pixel
+format once per tile size, and every Piece of that type and colour shares
+the same Surface, so drawing a piece is a plain format-matched blit.
+"""
+
+import pygame
+
+SPRITE_SHEET_PATH = 'Pieces/ChessPiecesArray.png'
+# Column of each piece on the sheet
+SPRITE_COLUMNS = {
+    'king': 1,
+    'queen': 0,
+    'rook': 2,
+    'knight': 3,
+    'bishop': 4,
+    'pawn': 5
+}
+# Row of each colour on the sheet; changed black to white for correct invertion.
+SPRITE_ROWS = {'white': 0, 'black': 1}
+
+_sheets = {}
+_atlases = {}
+
+
+def load_sheet(path):
+    sheet = _sheets.get(path)
+    if sheet is None:
+        sheet = pygame.image.load(path).convert_alpha()
+        _sheets[path] = sheet
+    return sheet
+
+
+class SpriteAtlas:
+    def __init__(self, tile_size, path=SPRITE_SHEET_PATH):
+        self.tile_size = tile_size
+        sheet = load_sheet(path)
+        sprite_size = sheet.get_height() // 2
+        self.sprites = {}
+        for color, row in SPRITE_ROWS.items():
+            for piece_type, col in SPRITE_COLUMNS.items():
+                sprite = sheet.subsurface(col * sprite_size, row * sprite_size, sprite_size, sprite_size)
+                if sprite_size != tile_size:
+                    sprite = pygame.transform.smoothscale(sprite, (tile_size, tile_size))
+                self.sprites[piece_type, color] = sprite.convert_alpha()
+
+    def get(self, piece_type, color):
+        return self.sprites[piece_type, color]
+
+
+def get_sprite_atlas(tile_size, path=SPRITE_SHEET_PATH):
+    """The shared SpriteAtlas for tile_size, built on first use"""
+    atlas = _atlases.get((path, tile_size))
+    if atlas is None:
+        atlas = SpriteAtlas(tile_size, path)
+        _atlases[path, tile_size] = atlas
+    return atlas
@@ -0,0 +1,302 @@
+"""Endgame tablebases for king and one piece against a bare king.
+
+generate() solves KQK, KRK and KPK by retrograde analysis: it starts from
+the checkmates and works backwards through un-moves, one ply at a time, so
+every position gets its exact distance to mate.  The side with the extra
+piece is white in the tables; positions where black has it are looked up
+mirrored (see BitboardPosition.mirrored).
+
+A table file is a header followed by one byte per index
+``((side_to_move * 64 + white_king) * 64 + black_king) * 64 + piece``.
+The byte is from the side to move's point of view: 0 is a draw (or a
+position that cannot occur), 1-127 wins with mate in that many plies, and
+128 + n loses, getting mated in n plies.  Tables are probed through mmap.
+"""
+
+import mmap
+import os
+from collections import deque
+
+from .bitboard import WHITE, BLACK, PAWN, ROOK, QUEEN, KING
+from .movegen import KING_ATTACKS, KING_TARGETS, PAWN_ATTACKS, rook_attacks, bishop_attacks
+
+TABLEBASE_MAGIC = b'MCTB0001'
+TABLE_SIZE = 2 * 64 * 64 * 64
+# Table name for the extra piece, in the order they have to be generated:
+# a KPK pawn promotes into KQK
+TABLES = {QUEEN: 'KQK', ROOK: 'KRK', PAWN: 'KPK'}
+LOSS = 128
+
+WIN, DRAW, LOSS_RESULT = 1, 0, -1
+
+
+def table_index(side_to_move, white_king, black_king, piece):
+    return ((side_to_move * 64 + white_king) * 64 + black_king) * 64 + piece
+
+
+def piece_attacks(piece_type, square, occupied):
+    if piece_type == QUEEN:
+        return rook_attacks(square, occupied) | bishop_attacks(square, occupied)
+    if piece_type == ROOK:
+        return rook_attacks(square, occupied)
+    return PAWN_ATTACKS[WHITE][square]
+
+
+def is_valid(piece_type, side_to_move, white_king, black_king, piece):
+    """True for positions that can occur: no shared squares, kings apart, no pawn on an end row,
+    and the side that just moved not in check"""
+    if white_king == black_king or piece == white_king or piece == black_king:
+        return False
+    if KING_ATTACKS[white_king] >> black_king & 1:
+        return False
+    if piece_type == PAWN and piece >> 3 in (0, 7):
+        return False
+    if side_to_move == WHITE:
+        occupied = 1 << white_king | 1 << black_king | 1 << piece
+        return not piece_attacks(piece_type, piece, occupied) >> black_king & 1
+    return True
+
+
+def white_moves(piece_type, white_king, black_king, piece):
+    """Yield (index or None, promotion square or None) for each white move"""
+    occupied = 1 << white_king | 1 << black_king | 1 << piece
+    for target in KING_TARGETS[white_king]:
+        if target != piece and not KING_ATTACKS[black_king] >> target & 1:
+            yield table_index(BLACK, target, black_king, piece), None
+    if piece_type == PAWN:
+        push = piece + 8
+        if not occupied >> push & 1:
+            if push >> 3 == 7:
+                yield None, push
+            else:
+                yield table_index(BLACK, white_king, black_king, push), None
+                if piece >> 3 == 1 and not occupied >> (push + 8) & 1:
+                    yield table_index(BLACK, white_king, black_king, push + 8), None
+        return
+    targets = piece_attacks(piece_type, piece, occupied) & ~(1 << white_king)
+    while targets:
+        low_bit = targets & -targets
+        targets ^= low_bit
+        yield table_index(BLACK, white_king, black_king, low_bit.bit_length() - 1), None
+
+
+def black_moves(piece_type, white_king, black_king, piece):
+    """Yield the index after each legal black king move, or None for capturing the piece"""
+    # The king does not block a slider looking past it
+    attacked = KING_ATTACKS[white_king] | piece_attacks(piece_type, piece, 1 << white_king | 1 << piece)
+    for target in KING_TARGETS[black_king]:
+        if attacked >> target & 1:
+            continue
+        if target == piece:
+            yield None
+        else:
+            yield table_index(WHITE, white_king, target, piece)
+
+
+def white_unmoves(piece_type, white_king, black_king, piece):
+    """Indices of the white-to-move positions that lead to this black-to-move one"""
+    occupied = 1 << white_king | 1 << black_king | 1 << piece
+    sources = []
+    for source in KING_TARGETS[white_king]:
+        if source != piece and source != black_king and not KING_ATTACKS[black_king] >> source & 1:
+            sources.append((source, piece))
+    if piece_type == PAWN:
+        source = piece - 8
+        if source >> 3 >= 1 and not occupied >> source & 1:
+            sources.append((white_king, source))
+            if piece >> 3 == 3 and not occupied >> (source - 8) & 1:
+                sources.append((white_king, source - 8))
+    else:
+        # Sliders move back along the same lines they move forward on
+        targets = piece_attacks(piece_type, piece, occupied) & ~occupied
+        while targets:
+            low_bit = targets & -targets
+            targets ^= low_bit
+            sources.append((white_king, low_bit.bit_length() - 1))
+    indices = []
+    for source_king, source_piece in sources:
+        if is_valid(piece_type, WHITE, source_king, black_king, source_piece):
+            indices.append(table_index(WHITE, source_king, black_king, source_piece))
+    return indices
+
+
+def black_unmoves(piece_type, white_king, black_king, piece):
+    """Indices of the black-to-move positions that lead to this white-to-move one"""
+    return [
+        table_index(BLACK, white_king, source, piece)
+        for source in KING_TARGETS[black_king]
+        if source != white_king and source != piece and not KING_ATTACKS[white_king] >> source & 1
+    ]
+
+
+def generate(piece_type, queen_table=None):
+    """Solve the table for king and piece_type against a king; returns a bytearray
+
+    KPK needs the finished KQK table for its promotions.
+    """
+    table = bytearray(TABLE_SIZE)
+    # Legal black moves not yet known to lose; a capture or a drawn reply keeps it above zero forever
+    remaining = {}
+    # Promotions found by white moves, by the ply at which they win
+    promotion_wins = {}
+    losses = deque()
+
+    for white_king in range(64):
+        for black_king in range(64):
+            for piece in range(64):
+                if is_valid(piece_type, BLACK, white_king, black_king, piece):
+                    index = table_index(BLACK, white_king, black_king, piece)
+                    moves = list(black_moves(piece_type, white_king, black_king, piece))
+                    if not moves:
+                        occupied = 1 << white_king | 1 << piece
+                        if piece_attacks(piece_type, piece, occupied) >> black_king & 1:
+                            table[index] = LOSS
+                            losses.append(index)
+                    elif None not in moves:
+                        remaining[index] = len(moves)
+                if piece_type == PAWN and is_valid(piece_type, WHITE, white_king, black_king, piece):
+                    for _, promotion in white_moves(piece_type, white_king, black_king, piece):
+                        if promotion is None:
+                            continue
+                        value = queen_table[table_index(BLACK, white_king, black_king, promotion)]
+                        if value >= LOSS:
+                            plies = value - LOSS + 1
+                            index = table_index(WHITE, white_king, black_king, piece)
+                            best = promotion_wins.get(index)
+                            if best is None or plies < best:
+                                promotion_wins[index] = plies
+
+    promotions_by_ply = {}
+    for index, plies in promotion_wins.items():
+        promotions_by_ply.setdefault(plies, []).append(index)
+
+    plies = 0
+    while losses or any(ply > plies for ply in promotions_by_ply):
+        # White wins in plies + 1 by moving into any of these losses
+        wins = []
+        for index in losses:
+            for source in white_unmoves(piece_type, *unpack_index(index)[1:]):
+                if not table[source]:
+                    table[source] = plies + 1
+                    wins.append(source)
+        for index in promotions_by_ply.pop(plies + 1, ()):
+            if not table[index]:
+                table[index] = plies + 1
+                wins.append(index)
+        # Black loses in plies + 2 once every move walks into a win
+        losses = deque()
+        for index in wins:
+            for source in black_unmoves(piece_type, *unpack_index(index)[1:]):
+                count = remaining.get(source)
+                if count is None:
+                    continue
+                if count == 1:
+                    del remaining[source]
+                    table[source] = LOSS + plies + 2
+                    losses.append(source)
+                else:
+                    remaining[source] = count - 1
+        plies += 2
+    return table
+
+
+def unpack_index(index):
+    return index >> 18, index >> 12 & 63, index >> 6 & 63, index & 63
+
+
+def write_table(path, table):
+    with open(path, 'wb') as table_file:
+        table_file.write(TABLEBASE_MAGIC)
+        table_file.write(table)
+
+
+def generate_all(directory, report=None):
+    """Generate every table into directory; report(name, table, seconds) is called after each"""
+    import time
+
+    os.makedirs(directory, exist_ok=True)
+    queen_table = None
+    for piece_type, name in TABLES.items():
+        start_time = time.perf_counter()
+        table = generate(piece_type, queen_table)
+        write_table(os.path.join(directory, name + '.tb'), table)
+        if piece_type == QUEEN:
+            queen_table = table
+        if report is not None:
+            report(name, table, time.perf_counter() - start_time)
+
+
+class Tablebases:
+    """Memory-mapped tables found in a directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = []
+        self.tables = {}
+        for piece_type, name in TABLES.items():
+            path = os.path.join(directory, name + '.tb')
+            if not os.path.exists(path) or os.path.getsize(path) != len(TABLEBASE_MAGIC) + TABLE_SIZE:
+                continue
+            table_file = open(path, 'rb')
+            table_map = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if table_map[:len(TABLEBASE_MAGIC)] != TABLEBASE_MAGIC:
+                table_map.close()
+                table_file.close()
+                continue
+            self.files.append((table_file, table_map))
+            self.tables[piece_type] = table_map
+
+    def probe(self, position):
+        """Return (result, plies) for the side to move, or None when no table covers position
+
+        result is WIN, DRAW or LOSS_RESULT and plies the distance to mate.
+        """
+        occupied = position.occupied[WHITE] | position.occupied[BLACK]
+        count = occupied.bit_count()
+        if count == 2:
+            return DRAW, 0
+        if count != 3:
+            return None
+        for color in (WHITE, BLACK):
+            pieces = position.pieces[color]
+            if position.occupied[color] == pieces[KING]:
+                continue
+            strong = color
+            extra = position.occupied[color] ^ pieces[KING]
+            piece_type = position.mailbox[extra.bit_length() - 1][1]
+            break
+        table = self.tables.get(piece_type)
+        if table is None:
+            return None
+        white_king = position.king_square(strong)
+        black_king = position.king_square(strong ^ 1)
+        piece = extra.bit_length() - 1
+        side_to_move = position.side_to_move
+        if strong == BLACK:
+            white_king ^= 56
+            black_king ^= 56
+            piece ^= 56
+            side_to_move ^= 1
+        value = table[len(TABLEBASE_MAGIC) + table_index(side_to_move, white_king, black_king, piece)]
+        if value == 0:
+            return DRAW, 0
+        if value >= LOSS:
+            return LOSS_RESULT, value - LOSS
+        return WIN, value
+
+    def close(self):
+        for table_file, table_map in self.files:
+            table_map.close()
+            table_file.close()
+        self.files = []
+        self.tables = {}
+
+
+def open_tablebases(directory):
+    """Tablebases for directory, or None when it holds no tables"""
+    if not directory or not os.path.isdir(directory):
+        return None
+    tablebases = Tablebases(directory)
+    if not tablebases.tables:
+        return None
+    return tablebases
@@ -0,0 +1,161 @@
+"""Fixed-size transposition table for ChessAI search.
+
+Entries are two 64-bit words kept in flat arrays so the memory cap is exact:
+the packed data word (best move, score, depth, bound type, search age) and
+the Zobrist key XORed with that data word.  A probe only succeeds when both
+words agree, so a torn or colliding entry reads as a miss instead of
+returning another position's score.
+
+Each index holds a bucket of two slots.  The first slot keeps the deepest
+result of the current search, the second is always replaced, so shallow
+entries near the leaves cannot push out expensive results near the root.
+"""
+
+from array import array
+
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+ENTRY_BYTES = 16
+SLOTS_PER_BUCKET = 2
+
+_MOVE_BITS = 12
+_SCORE_BITS = 20
+_SCORE_OFFSET = 1 << (_SCORE_BITS - 1)
+_SCORE_SHIFT = _MOVE_BITS
+_DEPTH_SHIFT = _SCORE_SHIFT + _SCORE_BITS
+_FLAG_SHIFT = _DEPTH_SHIFT + 8
+_AGE_SHIFT = _FLAG_SHIFT + 2
+
+
+def pack_entry(depth, flag, score, move, age):
+    return ((move or 0)
+            | (score + _SCORE_OFFSET) << _SCORE_SHIFT
+            | depth << _DEPTH_SHIFT
+            | flag << _FLAG_SHIFT
+            | age << _AGE_SHIFT)
+
+
+def unpack_entry(data):
+    """Return (depth, flag, score, move) for a packed data word"""
+    return (
+        data >> _DEPTH_SHIFT & 0xFF,
+        data >> _FLAG_SHIFT & 3,
+        (data >> _SCORE_SHIFT & ((1 << _SCORE_BITS) - 1)) - _SCORE_OFFSET,
+        (data & ((1 << _MOVE_BITS) - 1)) or None,
+    )
+
+
+def entries_for_size(size_mb):
+    """Largest power-of-two bucket count whose entries fit in size_mb"""
+    buckets = max(1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * SLOTS_PER_BUCKET))
+    return 1 << (buckets.bit_length() - 1)
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16):
+        self.size_mb = size_mb
+        self.bucket_count = entries_for_size(size_mb)
+        self.mask = self.bucket_count - 1
+        self.keys, self.data = self.allocate(self.bucket_count * SLOTS_PER_BUCKET)
+        self.age = 0
+        self.probes = 0
+        self.hits = 0
+
+    def allocate(self, entry_count):
+        return array('Q', bytes(8 * entry_count)), array('Q', bytes(8 * entry_count))
+
+    def clear(self):
+        # One slice assignment per array; writing every slot from Python takes seconds on a large table
+        zeros = bytes(8 * len(self.keys))
+        memoryview(self.keys).cast('B')[:] = zeros
+        memoryview(self.data).cast('B')[:] = zeros
+        self.age = 0
+
+    def new_search(self):
+        """Mark entries from earlier searches as replaceable"""
+        self.age = (self.age + 1) & 0xFF
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        """Return (depth, flag, score, move) for key or None"""
+        self.probes += 1
+        index = (key & self.mask) * SLOTS_PER_BUCKET
+        for slot in (index, index + 1):
+            data = self.data[slot]
+            if data and self.keys[slot] ^ data == key:
+                self.hits += 1
+                return unpack_entry(data)
+        return None
+
+    def store(self, key, depth, flag, score, move):
+        index = (key & self.mask) * SLOTS_PER_BUCKET
+        data = pack_entry(depth, flag, score, move, self.age)
+
+        stored = self.data[index]
+        if (not stored
+                or self.keys[index] ^ stored == key
+                or stored >> _AGE_SHIFT != self.age
+                or depth >= stored >> _DEPTH_SHIFT & 0xFF):
+            slot = index
+        else:
+            slot = index + 1
+        self.data[slot] = data
+        self.keys[slot] = key ^ data
+
+    def hashfull(self):
+        """Per-mille of slots filled during the current search, UCI style"""
+        sample = min(len(self.data), 1000)
+        used = sum(1 for slot in range(sample)
+                   if self.data[slot] and self.data[slot] >> _AGE_SHIFT == self.age)
+        return used * 1000 // sample
+
+
+def attach_shared_memory(name):
+    """Open shared memory created by another process without taking ownership of it"""
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching also registers the block with the
+        # resource tracker; worker processes share their parent's tracker, so
+        # the creator's unlink still cleans it up exactly once
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """Transposition table stored in shared memory for several search processes
+
+    Processes write without locks; the key/data checksum makes a probe ignore
+    entries that another process was writing at the same moment.  The creator
+    owns the memory and must call close(unlink=True) when done.
+    """
+
+    def __init__(self, size_mb=16, name=None):
+        self.shared_memory = None
+        self.name = name
+        super().__init__(size_mb)
+
+    def allocate(self, entry_count):
+        # Imported here so that the single-process search does not load multiprocessing
+        from multiprocessing import shared_memory
+
+        if self.name is None:
+            self.shared_memory = shared_memory.SharedMemory(create=True, size=16 * entry_count)
+            self.name = self.shared_memory.name
+        else:
+            self.shared_memory = attach_shared_memory(self.name)
+        words = self.shared_memory.buf.cast('Q')
+        return words[:entry_count], words[entry_count:2 * entry_count]
+
+    def clear(self):
+        self.shared_memory.buf[:] = bytes(self.shared_memory.size)
+        self.age = 0
+
+    def close(self, unlink=False):
+        self.keys.release()
+        self.data.release()
+        self.shared_memory.close()
+        if unlink:
+            self.shared_memory.unlink()
@@ -5,6 +5,7 @@ from ui.popup import Popup
 from code_logic.chessboard import ChessBoard
 from code_logic.game_rules import GameRules
 from code_logic.chess_ai import ChessAI
+from code_logic.bitboard import encode_move, square_of
 from audio.sounds import SoundManager
 from ui.start_menu import StartMenu
 from ui.game_menu import GameMenu
@@ -12,6 +13,7 @@ from ui.status_display import StatusDisplay
 from code_logic.save_manager import SaveManager
 from ui.save_dialog import SaveDialog
 from ui.load_dialog import LoadDialog
+from ui.renderer import LayeredRenderer
 
 def main():
     pygame.init()
@@ -103,13 +105,77 @@ def run_game(screen, screen_width, board_height, sidebar_width, sound_manager, s
     turn_lock = threading.Lock()
     ai_move_ready = threading.Event()
     ai_thread = None
+    ai_stop_signal = threading.Event()
 
-    def calculate_ai_move(ai, color):
-        best_move = ai.get_best_move(color)
+    # Pondering (Human_vs_AI): the AI searches the predicted reply during the human's turn
+    ponder_thread = None
+    ponder_ai = None
+    ponder_result = {'reply': None, 'move': None}
+
+    def calculate_ai_move(ai, color, stop_signal):
+        best_move = ai.get_best_move(color, stop_signal)
         with turn_lock:
+            if stop_signal.is_set():
+                return
             ai_move_results[color] = best_move
             ai_move_ready.set()
 
+    def cancel_ai_search():
+        """Stop the AI search thread, wait for it and forget any move it found"""
+        nonlocal ai_thread
+        if ai_thread is not None:
+            ai_stop_signal.set()
+            ai_thread.join()
+            ai_thread = None
+        with turn_lock:
+            ai_move_results['white'] = None
+            ai_move_results['black'] = None
+            ai_move_ready.clear()
+
+    def ponder_ai_move(ai, virtual_board):
+        best_move, _ = ai.ponder_search(virtual_board)
+        with turn_lock:
+            ponder_result['move'] = best_move
+
+    def start_pondering(ai, color):
+        nonlocal ponder_thread, ponder_ai
+        if not ai.ponder or game_rules.is_game_over():
+            return
+        virtual_board = ai.get_ponder_board(color)
+        if virtual_board is None:
+            return
+        ai.stop_signal = threading.Event()
+        # The ponder search replaces ai.ponder_move with its own prediction
+        ponder_result['reply'] = ai.ponder_move
+        ponder_result['move'] = None
+        ponder_ai = ai
+        ponder_thread = threading.Thread(target=ponder_ai_move, args=(ai, virtual_board))
+        ponder_thread.start()
+
+    def stop_pondering():
+        nonlocal ponder_thread, ponder_ai
+        if ponder_thread is not None:
+            ponder_ai.stop_signal.set()
+            ponder_thread.join()
+            ponder_ai.stop_signal = None
+        ponder_thread = None
+        ponder_ai = None
+
+    def close_ais():
+        """Release the opening books and tables of the AIs; their threads must have stopped"""
+        for ai in (ai_white, ai_black):
+            if ai is not None:
+                ai.close()
+
+    def check_ponder_move(origin, destination):
+        """Keep the ponder search on a ponder hit, drop it otherwise"""
+        if ponder_thread is None:
+            return
+        if ponder_result['reply'] == encode_move(square_of(origin), square_of(destination)):
+            ponder_ai.ponder_hit()
+        else:
+            stop_pondering()
+
     running = True
     selected_piece = None
     status_display = StatusDisplay(board_width, board_height, sidebar_width)
@@ -131,7 +197,8 @@ def run_game(screen, screen_width, board_height, sidebar_width, sound_manager, s
         current_player = game_rules.current_turn
         opponent = 'black' if current_player == 'white' else 'white'
 
-        game_over = game_rules.is_game_over()
+        status = game_rules.get_status(current_player)
+        game_over = status.result
         if game_over:
             if "Checkmate" in game_over and not checkmate_sound_played:
                 winner = 'black' if current_player == 'white' else 'white'
@@ -144,19 +211,15 @@ def run_game(screen, screen_width, board_height, sidebar_width, sound_manager, s
                 stalemate_sound_played = True
             return
 
-        if game_rules.is_in_check(current_player) and not check_sound_played:
+        if status.in_check and not check_sound_played:
             checking_piece = None
-            opponent_pieces = chess_board.get_pieces_by_color(opponent)
-            king_position = chess_board.find_king(current_player).position
-
-            for piece in opponent_pieces:
-                if king_position in piece.get_possible_moves(chess_board):
-                    if (opponent == 'black'):
-                        tempcolor2 = 'white'
-                    else:
-                        tempcolor2 = 'black'
-                    checking_piece = f"{tempcolor2.capitalize()}'s {piece.__class__.__name__}"
-                    break
+            if status.checkers:
+                piece = status.checkers[0]
+                if (opponent == 'black'):
+                    tempcolor2 = 'white'
+                else:
+                    tempcolor2 = 'black'
+                checking_piece = f"{tempcolor2.capitalize()}'s {piece.__class__.__name__}"
 
             if (current_player == 'black'):
                 tempplayer = 'white'
@@ -185,7 +248,8 @@ def run_game(screen, screen_width, board_height, sidebar_width, sound_manager, s
                 captured_piece
             )
 
-            game_over = game_rules.is_game_over()
+            status = game_rules.get_status(current_player)
+            game_over = status.result
             if game_over:
                 if "Checkmate" in game_over and not checkmate_sound_played:
                     winner = 'black' if current_player == 'white' else 'white'
@@ -198,19 +262,15 @@ def run_game(screen, screen_width, board_height, sidebar_width, sound_manager, s
                     stalemate_sound_played = True
                 return True
 
-            if game_rules.is_in_check(current_player) and not check_sound_played:
+            if status.in_check and not check_sound_played:
                 checking_piece = None
-                opponent_pieces = chess_board.get_pieces_by_color(opponent)
-                king_position = chess_board.find_king(current_player).position
-
-                for piece in opponent_pieces:
-                    if king_position in piece.get_possible_moves(chess_board):
-                        if (opponent == 'black'):
-                            tempcolor2 = 'white'
-                        else:
-                            tempcolor2 = 'black'
-                        checking_piece = f"{tempcolor2.capitalize()}'s {piece.__class__.__name__}"
-                        break
+                if status.checkers:
+                    piece = status.checkers[0]
+                    if (opponent == 'black'):
+                        tempcolor2 = 'white'
+                    else:
+                        tempcolor2 = 'black'
+                    checking_piece = f"{tempcolor2.capitalize()}'s {piece.__class__.__name__}"
                 
                 if (current_player == 'black'):
                     tempplayer = 'white'
@@ -236,6 +296,55 @@ def run_game(screen, screen_width, board_height, sidebar_width, sound_manager, s
             return True
         return False
 
+    move_highlight = pygame.Surface((chess_board.tile_size, chess_board.tile_size), pygame.SRCALPHA)
+    pygame.draw.rect(move_highlight, (0, 255, 0, 128), move_highlight.get_rect())
+
+    def draw_board_region():
+        screen.fill((255, 255, 255))
+        chess_board.construct_board()
+
+        # Highlight selected piece and possible moves
+        if selected_piece:
+            x = chess_board.board_offset_x + selected_piece.position[1] * chess_board.tile_size
+            y = chess_board.board_offset_y + selected_piece.position[0] * chess_board.tile_size
+            pygame.draw.rect(screen, (255, 255, 0), (x, y, chess_board.tile_size, chess_board.tile_size), 3)
+
+            # Legal moves only, from the status worked out once for this position
+            possible_moves = game_rules.get_status().moves_for(selected_piece)
+            for move in possible_moves:
+                move_x = chess_board.board_offset_x + move[1] * chess_board.tile_size
+                move_y = chess_board.board_offset_y + move[0] * chess_board.tile_size
+                screen.blit(move_highlight, (move_x, move_y))
+
+        chess_board.draw_pieces()
+
+    def draw_sidebar_region():
+        draw_turn_indicator()
+        status_display.draw_move_history(screen, game_rules.move_history)
+        status_display.draw(screen)
+        if not game_menu.menu_open:
+            game_menu.draw_menu_icon(screen)
+
+    def draw_overlays():
+        nonlocal popup
+        if game_menu.menu_open:
+            game_menu.draw_menu(screen)
+
+        # Draw dialogs on top
+        if save_dialog:
+            save_dialog.draw(screen)
+        if load_dialog:
+            load_dialog.draw(screen)
+
+        # Draw popup messages
+        if popup:
+            if not popup.draw():
+                popup = None
+
+    renderer = LayeredRenderer(screen)
+    renderer.add_region('board', (0, 0, board_width, board_height), draw_board_region)
+    renderer.add_region('sidebar', (board_width, 0, sidebar_width, board_height), draw_sidebar_region)
+
     while running:
         dt = clock.tick(60)
         mouse_pos = pygame.mouse.get_pos()
@@ -243,10 +352,26 @@ def run_game(screen, screen_width, board_height, sidebar_width, sound_manager, s
         current_turn = game_rules.current_turn
         current_ai = ai_black if current_turn == 'white' else ai_white
 
+        # The AI waits while a dialog or the menu is open; its search restarts when play resumes
+        ai_paused = save_dialog or load_dialog or game_menu.menu_open
+        if ai_paused and ai_thread is not None and ai_thread.is_alive():
+            cancel_ai_search()
+
         # Handle AI moves (non-blocking, threaded)
-        if game_mode in ['Human_vs_AI', 'AI_vs_AI'] and current_ai and not save_dialog and not load_dialog and not game_menu.menu_open:
-            if not ai_move_ready.is_set() and (ai_thread is None or not ai_thread.is_alive()):
-                ai_thread = threading.Thread(target=calculate_ai_move, args=(current_ai, current_turn))
+        if game_mode in ['Human_vs_AI', 'AI_vs_AI'] and current_ai and not ai_paused:
+            if ponder_thread is not None and ponder_ai is current_ai:
+                # Ponder hit: the search already running is on this position
+                if not ponder_thread.is_alive():
+                    ponder_thread = None
+                    ponder_ai = None
+                    current_ai.stop_signal = None
+                    with turn_lock:
+                        if ponder_result['move'] is not None:
+                            ai_move_results[current_turn] = current_ai.to_board_move(ponder_result['move'])
+                            ai_move_ready.set()
+            elif not ai_move_ready.is_set() and (ai_thread is None or not ai_thread.is_alive()):
+                ai_stop_signal = threading.Event()
+                ai_thread = threading.Thread(target=calculate_ai_move, args=(current_ai, current_turn, ai_stop_signal))
                 ai_thread.start()
             elif ai_move_ready.is_set():
                 with turn_lock:
@@ -256,6 +381,9 @@ def run_game(screen, screen_width, board_height, sidebar_width, sound_manager, s
                         handle_move(piece, new_position)
                         ai_move_results[current_turn] = None
                         ai_move_ready.clear()
+                        ai_thread = None
+                        if game_mode == 'Human_vs_AI':
+                            start_pondering(current_ai, current_turn)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -283,19 +411,23 @@ def run_game(screen, screen_width, board_height, sidebar_width, sound_manager, s
                         load_dialog = None
                     elif result.startswith("load:"):
                         game_name = result[5:]
+                        # The board is about to be replaced under the AI threads
+                        stop_pondering()
+                        cancel_ai_search()
                         success, message, loaded_game_mode = save_manager.load_game(game_name, chess_board, game_rules)
                         load_dialog = None
                         if success:
                             # Update game mode and AI
                             game_mode = loaded_game_mode
+                            close_ais()
                             ai_white = ChessAI(chess_board, game_rules, depth=4) if game_mode == 'AI_vs_AI' else None
                             ai_black = ChessAI(chess_board, game_rules, depth=3) if game_mode in ['Human_vs_AI', 'AI_vs_AI'] else None
                             if ai_white:
                                 ai_white.status_display = status_display
                             if ai_black:
                                 ai_black.status_display = status_display
-                            # Reset AI state
-                            ai_move_ready.clear()
+                            # Every region shows the loaded game, whatever their keys say
+                            renderer.invalidate()
                         popup = Popup(screen, message, duration=3000)
                         popup.show()
                     elif result.startswith("delete:"):
@@ -324,7 +456,8 @@ def run_game(screen, screen_width, board_height, sidebar_width, sound_manager, s
                             popup = Popup(screen, "No saved games found!", duration=2000)
                             popup.show()
                     elif menu_action == 'main_menu':
-                        return
+                        running = False
+                        break
                     continue
 
                 # Only allow piece selection if not AI vs AI and menu is closed
@@ -337,7 +470,9 @@ def run_game(screen, screen_width, board_height, sidebar_width, sound_manager, s
                         if piece and piece.color == game_rules.current_turn:
                             selected_piece = piece
                     else:
+                        origin = selected_piece.position
                         if handle_move(selected_piece, tile_position):
+                            check_ponder_move(origin, tile_position)
                             selected_piece = None
                         else:
                             selected_piece = piece if piece and piece.color == game_rules.current_turn else None
@@ -346,43 +481,17 @@ def run_game(screen, screen_width, board_height, sidebar_width, sound_manager, s
         if save_dialog:
             save_dialog.update(dt)
 
-        # Draw everything
-        screen.fill((255, 255, 255))
-        chess_board.construct_board()
-
-        # Highlight selected piece and possible moves
-        if selected_piece:
-            x = chess_board.board_offset_x + selected_piece.position[1] * chess_board.tile_size
-            y = chess_board.board_offset_y + selected_piece.position[0] * chess_board.tile_size
-            pygame.draw.rect(screen, (255, 255, 0), (x, y, chess_board.tile_size, chess_board.tile_size), 3)
-
-            possible_moves = selected_piece.get_possible_moves(chess_board)
-            for move in possible_moves:
-                move_x = chess_board.board_offset_x + move[1] * chess_board.tile_size
-                move_y = chess_board.board_offset_y + move[0] * chess_board.tile_size
-                highlight_surface = pygame.Surface((chess_board.tile_size, chess_board.tile_size), pygame.SRCALPHA)
-                pygame.draw.rect(highlight_surface, (0, 255, 0, 128), highlight_surface.get_rect())
-                screen.blit(highlight_surface, (move_x, move_y))
-
-        chess_board.draw_pieces()
-        draw_turn_indicator()
+        # Draw only the regions that changed; overlays redraw the whole frame
         update_game_status()
-        status_display.draw_move_history(screen, game_rules.move_history)
-        status_display.draw(screen)
-        game_menu.draw_menu(screen)
-
-        # Draw dialogs on top
-        if save_dialog:
-            save_dialog.draw(screen)
-        if load_dialog:
-            load_dialog.draw(screen)
-
-        # Draw popup messages
-        if popup:
-            if not popup.draw():
-                popup = None
-
-        pygame.display.flip()
+        board_key = (chess_board.version, selected_piece.position if selected_piece else None)
+        sidebar_key = (game_rules.current_turn, len(game_rules.move_history), status_display.state_key())
+        overlay_open = game_menu.menu_open or save_dialog or load_dialog or popup
+        renderer.render({'board': board_key, 'sidebar': sidebar_key}, draw_overlays if overlay_open else None)
+
+    # Leaving the game: no AI thread may outlive its board
+    stop_pondering()
+    cancel_ai_search()
+    close_ais()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
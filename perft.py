@@ -0,0 +1,228 @@
+"""Perft benchmark and move generator correctness check.
+
+Counts the leaf nodes of the legal move tree to a given depth, either with
+the bitboard generator the AI searches on ('virtual') or with the Piece
+classes on a headless BoardState ('board'), and reports nodes per second.
+The board generator decides legality by itself, making each move and
+looking for attacks on the king through the Piece move lists, so it checks
+the bitboard generator rather than repeating it.
+
+    python perft.py --depth 4
+    python perft.py --fen "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -" --depth 3 --divide
+    python perft.py --verify --generator both --workers 4
+
+Run it from the project folder, like main.py.  Neither generator needs
+pygame.
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from code_logic.board_state import BoardState
+from code_logic.bitboard import (BitboardPosition, START_FEN, COLOR_NAMES, PIECE_NAMES,
+                                 move_to_uci, uci_to_move, position_of, square_of, encode_move)
+
+GENERATORS = ('virtual', 'board')
+
+# Leaf counts under this game's rules: no castling or en passant, and pawns
+# promote to queens only.  The start position matches the published counts
+# (minus the en passant captures that first appear at depth 5); the others
+# were cross-checked against a plain reference generator.
+REFERENCE_POSITIONS = [
+    ('start', START_FEN, [20, 400, 8902, 197281, 4865351]),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w - - 0 1', [46, 1865, 86585, 3488552]),
+    ('endgame', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', [14, 191, 2810, 43087]),
+    ('promotions', 'n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1', [15, 210, 3253, 47828]),
+    ('middlegame', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w - - 0 1', [6, 222, 7855, 305965]),
+]
+
+
+def perft_virtual(position, depth):
+    if depth == 0:
+        return 1
+    moves = position.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        position.make_move(move)
+        nodes += perft_virtual(position, depth - 1)
+        position.undo_move()
+    return nodes
+
+
+def create_headless_board(fen):
+    """BoardState and side to move for a FEN position"""
+    board = BoardState()
+    position = BitboardPosition.from_fen(fen)
+    pieces = []
+    for square, piece in enumerate(position.mailbox):
+        if piece is None:
+            continue
+        color, piece_type = COLOR_NAMES[piece[0]], PIECE_NAMES[piece[1]]
+        pieces.append(board.create_piece(piece_type, color, position_of(square)))
+    board.set_pieces(pieces)
+    return board, COLOR_NAMES[position.side_to_move]
+
+
+def board_in_check(board, color):
+    """Whether an opposing Piece could move onto color's king"""
+    king = board.find_king(color)
+    if king is None:
+        return False
+    return any(piece.color != color and king.position in piece.get_possible_moves(board)
+               for piece in board.pieces)
+
+
+def board_legal_moves(board, color):
+    moves = []
+    for piece in list(board.pieces):
+        if piece.color != color:
+            continue
+        for destination in piece.get_possible_moves(board):
+            undo = make_board_move(board, piece, destination)
+            if not board_in_check(board, color):
+                moves.append((piece, destination))
+            undo_board_move(board, undo)
+    return moves
+
+
+def make_board_move(board, piece, destination):
+    """Play a move on the BoardState and return what undo_board_move needs"""
+    origin = piece.position
+    captured = board.get_piece_at(destination)
+    piece.move(destination, board)
+    promoted = board.get_piece_at(destination)
+    return piece, origin, captured, promoted if promoted is not piece else None
+
+
+def undo_board_move(board, undo):
+    piece, origin, captured, promoted = undo
+    if promoted is not None:
+        board.remove_piece(promoted)
+        board.add_piece(piece)
+    board.place_piece(piece, origin)
+    if captured is not None:
+        board.add_piece(captured)
+
+
+def perft_board(board, color, depth):
+    if depth == 0:
+        return 1
+    moves = board_legal_moves(board, color)
+    if depth == 1:
+        return len(moves)
+    opponent = 'black' if color == 'white' else 'white'
+    nodes = 0
+    for piece, destination in moves:
+        undo = make_board_move(board, piece, destination)
+        nodes += perft_board(board, opponent, depth - 1)
+        undo_board_move(board, undo)
+    return nodes
+
+
+def root_moves(fen, generator):
+    """Legal root moves in coordinate notation"""
+    if generator == 'virtual':
+        return [move_to_uci(move) for move in BitboardPosition.from_fen(fen).legal_moves()]
+    board, color = create_headless_board(fen)
+    return [move_to_uci(encode_move(square_of(piece.position), square_of(destination)))
+            for piece, destination in board_legal_moves(board, color)]
+
+
+def count_after_move(fen, generator, move_text, depth):
+    """Leaf count below one root move; runs in worker processes"""
+    move = uci_to_move(move_text)
+    if generator == 'virtual':
+        position = BitboardPosition.from_fen(fen)
+        position.make_move(move)
+        return perft_virtual(position, depth - 1)
+    board, color = create_headless_board(fen)
+    piece = board.get_piece_at(position_of(move & 63))
+    make_board_move(board, piece, position_of(move >> 6))
+    return perft_board(board, 'black' if color == 'white' else 'white', depth - 1)
+
+
+def divide(fen, generator, depth, workers=1):
+    """Return {root move: leaf count}, splitting root moves across processes when workers > 1"""
+    moves = root_moves(fen, generator)
+    if workers > 1 and depth > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            counts = executor.map(count_after_move, [fen] * len(moves), [generator] * len(moves),
+                                  moves, [depth] * len(moves))
+            return dict(zip(moves, counts))
+    if depth == 1:
+        return {move: 1 for move in moves}
+    return {move: count_after_move(fen, generator, move, depth) for move in moves}
+
+
+def perft(fen, generator, depth, workers=1):
+    """Return (nodes, seconds)"""
+    start_time = time.perf_counter()
+    if workers > 1:
+        nodes = sum(divide(fen, generator, depth, workers).values())
+    elif generator == 'virtual':
+        nodes = perft_virtual(BitboardPosition.from_fen(fen), depth)
+    else:
+        board, color = create_headless_board(fen)
+        nodes = perft_board(board, color, depth)
+    return nodes, time.perf_counter() - start_time
+
+
+def print_result(generator, depth, nodes, seconds, expected=None):
+    nps = int(nodes / seconds) if seconds > 0 else 0
+    line = f"{generator:>8}  depth {depth}  nodes {nodes:>10}  time {seconds:8.3f}s  nps {nps:>9}"
+    if expected is not None:
+        line += "  ok" if nodes == expected else f"  FAIL (expected {expected})"
+    print(line)
+
+
+def verify(generators, max_depth, workers):
+    failures = 0
+    for name, fen, counts in REFERENCE_POSITIONS:
+        print(f"{name}: {fen}")
+        for generator in generators:
+            for depth, expected in enumerate(counts[:max_depth], start=1):
+                nodes, seconds = perft(fen, generator, depth, workers)
+                print_result(generator, depth, nodes, seconds, expected)
+                failures += nodes != expected
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count move-generator leaf nodes and measure their speed.")
+    parser.add_argument('--fen', default=START_FEN, help="position to search (default: start position)")
+    parser.add_argument('--depth', type=int, default=3, help="depth to count to, or the depth cap with --verify")
+    parser.add_argument('--generator', choices=GENERATORS + ('both',), default='virtual',
+                        help="'virtual' is the AI's bitboard generator, 'board' is Piece on BoardState")
+    parser.add_argument('--divide', action='store_true', help="print the leaf count below each root move")
+    parser.add_argument('--workers', type=int, default=1, help="processes to split root moves across")
+    parser.add_argument('--verify', action='store_true', help="check the stored reference positions")
+    args = parser.parse_args(argv)
+
+    generators = GENERATORS if args.generator == 'both' else (args.generator,)
+
+    if args.verify:
+        failures = verify(generators, args.depth, args.workers)
+        print("all reference counts match" if not failures else f"{failures} reference count(s) differ")
+        return 1 if failures else 0
+
+    for generator in generators:
+        if args.divide:
+            start_time = time.perf_counter()
+            counts = divide(args.fen, generator, args.depth, args.workers)
+            seconds = time.perf_counter() - start_time
+            for move in sorted(counts):
+                print(f"{move}: {counts[move]}")
+            print_result(generator, args.depth, sum(counts.values()), seconds)
+        else:
+            for depth in range(1, args.depth + 1):
+                nodes, seconds = perft(args.fen, generator, depth, args.workers)
+                print_result(generator, depth, nodes, seconds)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,322 @@
+"""Headless self-play tournament between two ChessAI configurations.
+
+Plays games without pygame across a process pool, writes one JSON line per
+game and reports the Elo difference of the first engine over the second
+with a 95% error bar.  With --sprt the match stops as soon as the
+sequential probability ratio test accepts one of the two hypotheses.
+
+    python tournament.py --engine new:depth=4 --engine base:depth=4,lmr=off --games 400
+    python tournament.py --engine new:time=0.1 --engine base:time=0.1,null_move=off \\
+        --openings openings.epd --games 20000 --sprt 0 10 --output results.jsonl
+
+An engine is NAME:key=value,...  with the keys depth, time (seconds per
+move; overrides depth), hash (MB), null_move and lmr (on/off), book (a book
+file, default off) and tablebases (a folder, default off).
+
+Each opening is played twice with colours swapped.  The openings file holds
+one FEN or EPD per line; without one, openings are made by playing
+--random-plies random moves from the start position.  Games are adjudicated
+as draws on threefold repetition, bare kings or after --max-plies plies.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from code_logic.bitboard import BitboardPosition, START_FEN, WHITE, KING, move_to_uci
+from code_logic.chess_ai import ChessAI
+
+ENGINE_KEYS = ('depth', 'time', 'hash', 'null_move', 'lmr', 'book', 'tablebases')
+SWITCHES = {'on': True, 'off': False}
+# Normal quantile for the two-sided 95% error bar
+Z_95 = 1.959964
+
+_engines = None
+
+
+def parse_engine(text):
+    """(name, settings) for an --engine argument NAME:key=value,..."""
+    name, _, options = text.partition(':')
+    if not name:
+        raise argparse.ArgumentTypeError(f"engine needs a name: {text}")
+    settings = {'depth': 3, 'time': None, 'hash': 16, 'null_move': True, 'lmr': True,
+                'book': None, 'tablebases': None}
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        if key not in ENGINE_KEYS:
+            raise argparse.ArgumentTypeError(f"unknown engine setting {key!r}, expected one of {', '.join(ENGINE_KEYS)}")
+        try:
+            if key in ('depth', 'hash'):
+                settings[key] = int(value)
+            elif key == 'time':
+                settings[key] = float(value)
+            elif key in ('null_move', 'lmr'):
+                settings[key] = SWITCHES[value]
+            else:
+                settings[key] = None if value == 'off' else value
+        except (ValueError, KeyError):
+            raise argparse.ArgumentTypeError(f"bad value for {key}: {value!r}")
+    return name, settings
+
+
+def create_engine(settings):
+    ai = ChessAI(None, None, depth=settings['depth'], tt_size_mb=settings['hash'], time_limit=settings['time'],
+                 book_path=settings['book'], tablebase_path=settings['tablebases'])
+    ai.null_move_pruning = settings['null_move']
+    ai.late_move_reductions = settings['lmr']
+    ai.ponder = False
+    return ai
+
+
+def _init_worker(engine_settings):
+    global _engines
+    _engines = {name: create_engine(settings) for name, settings in engine_settings.items()}
+
+
+def adjudicate(position, seen):
+    """(result, reason) when the game is over, else None"""
+    if not position.legal_moves():
+        if position.in_check():
+            return ('0-1' if position.side_to_move == WHITE else '1-0'), 'checkmate'
+        return '1/2-1/2', 'stalemate'
+    occupied = position.occupied[0] | position.occupied[1]
+    if occupied == position.pieces[0][KING] | position.pieces[1][KING]:
+        return '1/2-1/2', 'insufficient material'
+    if seen.get(position.zobrist_key, 0) >= 3:
+        return '1/2-1/2', 'repetition'
+    return None
+
+
+def play_game(game, fen, white, black, max_plies):
+    """Play one game in a worker; returns its result record"""
+    engines = {WHITE: _engines[white], 1 - WHITE: _engines[black]}
+    for ai in engines.values():
+        ai.transposition_table.clear()
+    position = BitboardPosition.from_fen(fen, engines[WHITE].square_values)
+    seen = {position.zobrist_key: 1}
+    moves = []
+    start_time = time.perf_counter()
+    while True:
+        outcome = adjudicate(position, seen)
+        if outcome is not None:
+            result, reason = outcome
+            break
+        if len(moves) >= max_plies:
+            result, reason = '1/2-1/2', 'move limit'
+            break
+        ai = engines[position.side_to_move]
+        book_move = ai.opening_book.choose_move(position) if ai.opening_book is not None else None
+        move = book_move if book_move is not None else ai.search(position)[0]
+        position.make_move(move)
+        # Nothing searches the game so far; only the position matters
+        del position.history[:]
+        seen[position.zobrist_key] = seen.get(position.zobrist_key, 0) + 1
+        moves.append(move_to_uci(move))
+    return {
+        'game': game,
+        'opening': fen,
+        'white': white,
+        'black': black,
+        'result': result,
+        'reason': reason,
+        'plies': len(moves),
+        'seconds': round(time.perf_counter() - start_time, 3),
+        'moves': moves,
+    }
+
+
+def read_openings(path):
+    """FENs from a file of FEN or EPD lines; blank lines and # comments are skipped"""
+    openings = []
+    with open(path, encoding='utf-8') as openings_file:
+        for line in openings_file:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            # Only the board and side to move are read, so EPD operations are ignored
+            position = BitboardPosition.from_fen(line)
+            if position.legal_moves():
+                openings.append(position.to_fen())
+    return openings
+
+
+def random_openings(count, plies, seed):
+    """count distinct positions reached by plies random moves from the start position"""
+    rng = random.Random(seed)
+    openings = []
+    keys = set()
+    attempts = 0
+    while len(openings) < count and attempts < count * 20:
+        attempts += 1
+        position = BitboardPosition.from_fen(START_FEN)
+        for _ in range(plies):
+            legal_moves = position.legal_moves()
+            if not legal_moves:
+                break
+            position.make_move(rng.choice(legal_moves))
+        if position.legal_moves() and position.zobrist_key not in keys:
+            keys.add(position.zobrist_key)
+            openings.append(position.to_fen())
+    return openings
+
+
+def expected_score(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def score_statistics(wins, draws, losses):
+    """(mean score, variance of one game's score) for the first engine"""
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    return score, variance
+
+
+def elo_estimate(wins, draws, losses):
+    """(Elo difference, half-width of its 95% confidence interval)"""
+    games = wins + draws + losses
+    if not games:
+        return 0.0, float('inf')
+    score, variance = score_statistics(wins, draws, losses)
+    if variance == 0:
+        # Every game had the same result, which says nothing about the spread
+        return score_to_elo(score) + 0.0, float('inf')
+    margin = Z_95 * math.sqrt(variance / games)
+    low, high = score_to_elo(score - margin), score_to_elo(score + margin)
+    # + 0.0 turns an even score's -0.0 into 0.0
+    return score_to_elo(score) + 0.0, (high - low) / 2
+
+
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    """Log-likelihood ratio of H1 (elo1) against H0 (elo0), by the normal approximation"""
+    games = wins + draws + losses
+    if not games:
+        return 0.0
+    score, variance = score_statistics(wins, draws, losses)
+    if variance == 0:
+        return 0.0
+    score0, score1 = expected_score(elo0), expected_score(elo1)
+    return games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+
+def sprt_bounds(alpha, beta):
+    """(lower, upper) LLR bounds: below lower accept H0, above upper accept H1"""
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def schedule(games, openings, names):
+    """Yield (game, fen, white, black): each opening twice with colours swapped"""
+    for game in range(games):
+        fen = openings[game // 2 % len(openings)]
+        if game % 2 == 0:
+            yield game, fen, names[0], names[1]
+        else:
+            yield game, fen, names[1], names[0]
+
+
+def standings(first, second, wins, draws, losses, sprt, bounds):
+    elo, margin = elo_estimate(wins, draws, losses)
+    line = (f"{first} vs {second}: {wins + draws + losses} games, +{wins} ={draws} -{losses}, "
+            f"Elo {elo:+.1f} +/- {margin:.1f}")
+    if bounds is not None:
+        llr = sprt_llr(wins, draws, losses, *sprt)
+        line += f", LLR {llr:.2f} ({bounds[0]:.2f}, {bounds[1]:.2f})"
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play a headless match between two ChessAI configurations.")
+    parser.add_argument('--engine', action='append', type=parse_engine, required=True,
+                        help="NAME:key=value,... ; give exactly two, the one to test first")
+    parser.add_argument('--games', type=int, default=100, help="maximum number of games (default: 100)")
+    parser.add_argument('--openings', help="file of FEN or EPD opening positions")
+    parser.add_argument('--random-plies', type=int, default=4,
+                        help="random moves per generated opening when there is no openings file (default: 4)")
+    parser.add_argument('--seed', type=int, default=1, help="seed for generated openings")
+    parser.add_argument('--max-plies', type=int, default=300, help="adjudicate a draw after this many plies (default: 300)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="games played at once")
+    parser.add_argument('--output', default='tournament.jsonl', help="JSONL file of game results (default: tournament.jsonl)")
+    parser.add_argument('--sprt', nargs=2, type=float, metavar=('ELO0', 'ELO1'),
+                        help="stop when the SPRT accepts H0: elo = ELO0 or H1: elo = ELO1")
+    parser.add_argument('--alpha', type=float, default=0.05, help="SPRT false positive rate (default: 0.05)")
+    parser.add_argument('--beta', type=float, default=0.05, help="SPRT false negative rate (default: 0.05)")
+    parser.add_argument('--report', type=int, default=10, help="print the standings every this many games")
+    args = parser.parse_args(argv)
+
+    if len(args.engine) != 2:
+        parser.error("give exactly two --engine configurations")
+    (first, _), (second, _) = args.engine
+    if first == second:
+        parser.error("the two engines need different names")
+    engine_settings = dict(args.engine)
+
+    if args.openings:
+        openings = read_openings(args.openings)
+        if not openings:
+            parser.error(f"no usable positions in {args.openings}")
+    else:
+        openings = random_openings(max(1, (args.games + 1) // 2), args.random_plies, args.seed)
+    bounds = sprt_bounds(args.alpha, args.beta) if args.sprt else None
+
+    wins = draws = losses = 0
+    played = 0
+    decision = None
+    games = schedule(args.games, openings, (first, second))
+    with open(args.output, 'w', encoding='utf-8') as output, \
+            ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                initargs=(engine_settings,)) as executor:
+        pending = set()
+
+        def fill():
+            for game in games:
+                pending.add(executor.submit(play_game, *game, args.max_plies))
+                if len(pending) >= args.workers * 2:
+                    break
+
+        fill()
+        while pending and decision is None:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                record = future.result()
+                output.write(json.dumps(record) + '\n')
+                played += 1
+                if record['result'] == '1/2-1/2':
+                    draws += 1
+                elif (record['result'] == '1-0') == (record['white'] == first):
+                    wins += 1
+                else:
+                    losses += 1
+                if bounds is not None:
+                    llr = sprt_llr(wins, draws, losses, *args.sprt)
+                    if llr <= bounds[0]:
+                        decision = 'H0 accepted'
+                    elif llr >= bounds[1]:
+                        decision = 'H1 accepted'
+                if played % args.report == 0 or decision is not None:
+                    print(standings(first, second, wins, draws, losses, args.sprt, bounds), flush=True)
+            output.flush()
+            if decision is None:
+                fill()
+        for future in pending:
+            future.cancel()
+
+    print(standings(first, second, wins, draws, losses, args.sprt, bounds))
+    if bounds is not None:
+        print(f"SPRT: {decision or 'no decision'} after {played} games")
+    print(f"results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
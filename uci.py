@@ -0,0 +1,332 @@
+"""UCI front-end for ChessAI.
+
+Speaks the Universal Chess Interface on stdin/stdout so the engine can be
+loaded into chess GUIs and tournament managers:
+
+    python uci.py
+
+Supported commands are uci, isready, ucinewgame, setoption (Hash, Threads,
+Ponder, OwnBook), position startpos|fen ... [moves ...], go [depth N]
+[nodes N] [movetime MS] [wtime MS btime MS winc MS binc MS movestogo N]
+[infinite] [ponder], ponderhit, stop and quit.  The search runs on its own
+thread while the main thread keeps reading commands, so stop and ponderhit
+take effect mid-search.
+After each completed iteration an info line with depth, score, nodes, nps,
+hash table use and the principal variation is printed.
+
+Positions use standard chess orientation (white moves first, rank 1 at the
+bottom).  Castling and en passant do not exist in this game and pawns always
+promote to a queen.  Run it from the project folder so ChessAI finds the
+opening book and the endgame tables.
+"""
+
+import sys
+import threading
+
+from code_logic.bitboard import BitboardPosition, START_FEN, WHITE, PAWN, PROMOTION_ROW, move_to_uci, uci_to_move
+from code_logic.chess_ai import ChessAI, MATE_SCORE, MATE_THRESHOLD, MAX_SEARCH_DEPTH
+
+ENGINE_NAME = 'MiniChess'
+ENGINE_AUTHOR = 'AI_Project_MiniChess'
+
+DEFAULT_HASH_MB = 16
+MAX_HASH_MB = 1024
+MAX_THREADS = 64
+# Moves the remaining clock time is shared between when the GUI sends no movestogo
+DEFAULT_MOVES_TO_GO = 30
+# Milliseconds kept back for GUI and process latency
+MOVE_OVERHEAD_MS = 50
+MIN_MOVE_TIME_MS = 10
+
+
+def time_for_move(remaining_ms, increment_ms=0, moves_to_go=None):
+    """Seconds to spend on a move with remaining_ms on the clock"""
+    moves = moves_to_go if moves_to_go else DEFAULT_MOVES_TO_GO
+    budget = remaining_ms / moves + increment_ms * 3 / 4
+    budget = min(budget, remaining_ms - MOVE_OVERHEAD_MS)
+    return max(budget, MIN_MOVE_TIME_MS) / 1000
+
+
+def move_to_uci_text(position, move):
+    """Coordinate notation for move, with the q suffix UCI expects on a promotion"""
+    text = move_to_uci(move)
+    piece = position.mailbox[move & 63]
+    if piece is not None and piece[1] == PAWN and move >> 6 >> 3 == PROMOTION_ROW[piece[0]]:
+        text += 'q'
+    return text
+
+
+def format_pv(position, pv):
+    """The moves of pv in UCI notation, played on position and then taken back"""
+    texts = []
+    for move in pv:
+        texts.append(move_to_uci_text(position, move))
+        position.make_move(move)
+    for _ in pv:
+        position.undo_move()
+    return ' '.join(texts)
+
+
+def format_score(value, side_to_move):
+    """UCI score for a white-relative search value, seen from the side to move"""
+    if side_to_move != WHITE:
+        value = -value
+    if abs(value) > MATE_THRESHOLD:
+        moves = (MATE_SCORE - abs(value) + 1) // 2
+        return f"mate {moves if value > 0 else -moves}"
+    return f"cp {value}"
+
+
+def parse_go(tokens):
+    """Dictionary of the go parameters; numbers as ints, flags as True"""
+    options = {}
+    index = 0
+    while index < len(tokens):
+        name = tokens[index]
+        if name in ('infinite', 'ponder'):
+            options[name] = True
+        elif name in ('depth', 'movetime', 'wtime', 'btime', 'winc', 'binc', 'movestogo', 'nodes'):
+            if index + 1 < len(tokens):
+                try:
+                    options[name] = int(tokens[index + 1])
+                except ValueError:
+                    pass
+                index += 1
+        index += 1
+    return options
+
+
+class UCIEngine:
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        self.output_lock = threading.Lock()
+        self.hash_mb = DEFAULT_HASH_MB
+        self.threads = 1
+        self.own_book = True
+        # Whether the GUI may ponder; without it bestmove carries no ponder move
+        self.ponder = True
+        self.ai = None
+        self.fen = START_FEN
+        self.moves = []
+        self.search_thread = None
+        self.stop_signal = threading.Event()
+        # Set by stop or ponderhit; an infinite or ponder search waits for it before answering
+        self.release = threading.Event()
+        self.pondering = False
+
+    def send(self, line):
+        with self.output_lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def get_ai(self):
+        if self.ai is None:
+            self.ai = ChessAI(None, None, tt_size_mb=self.hash_mb, workers=self.threads, parallel_mode='lazy_smp')
+            self.ai.ponder = False
+        return self.ai
+
+    def reset_ai(self):
+        if self.ai is not None:
+            self.ai.close()
+            self.ai = None
+
+    def create_position(self):
+        """The current position with the moves played, as the search root"""
+        position = BitboardPosition.from_fen(self.fen, self.get_ai().square_values)
+        for text in self.moves:
+            try:
+                move = uci_to_move(text)
+            except (ValueError, IndexError):
+                break
+            if move not in position.legal_moves():
+                break
+            position.make_move(move)
+        # Mate scores count plies from the root
+        del position.history[:]
+        return position
+
+    def handle(self, line):
+        """Act on one command line; returns False on quit"""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command = tokens[0]
+        if command == 'uci':
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(f"option name Hash type spin default {DEFAULT_HASH_MB} min 1 max {MAX_HASH_MB}")
+            self.send(f"option name Threads type spin default 1 min 1 max {MAX_THREADS}")
+            self.send("option name Ponder type check default true")
+            self.send("option name OwnBook type check default true")
+            self.send("uciok")
+        elif command == 'isready':
+            self.send("readyok")
+        elif command == 'setoption':
+            self.set_option(tokens[1:])
+        elif command == 'ucinewgame':
+            self.stop_search()
+            if self.ai is not None:
+                self.ai.transposition_table.clear()
+            self.fen = START_FEN
+            self.moves = []
+        elif command == 'position':
+            self.set_position(tokens[1:])
+        elif command == 'go':
+            self.start_search(parse_go(tokens[1:]))
+        elif command == 'ponderhit':
+            self.ponder_hit()
+        elif command == 'stop':
+            self.stop_signal.set()
+            self.release.set()
+            self.wait_for_search()
+        elif command == 'quit':
+            self.stop_search()
+            self.reset_ai()
+            return False
+        return True
+
+    def set_option(self, tokens):
+        if 'name' not in tokens:
+            return
+        name_end = tokens.index('value') if 'value' in tokens else len(tokens)
+        name = ' '.join(tokens[tokens.index('name') + 1:name_end]).lower()
+        value = ' '.join(tokens[name_end + 1:])
+        # Options only change between searches, as UCI requires of the GUI
+        self.stop_search()
+        try:
+            if name == 'hash':
+                self.hash_mb = max(1, min(int(value), MAX_HASH_MB))
+                self.reset_ai()
+            elif name == 'threads':
+                self.threads = max(1, min(int(value), MAX_THREADS))
+                self.reset_ai()
+            elif name == 'ownbook':
+                self.own_book = value.lower() == 'true'
+            elif name == 'ponder':
+                self.ponder = value.lower() == 'true'
+        except ValueError:
+            self.send(f"info string invalid value for {name}: {value}")
+
+    def set_position(self, tokens):
+        if not tokens:
+            return
+        if tokens[0] == 'startpos':
+            fen = START_FEN
+            rest = tokens[1:]
+        elif tokens[0] == 'fen':
+            end = tokens.index('moves') if 'moves' in tokens else len(tokens)
+            fen = ' '.join(tokens[1:end])
+            rest = tokens[end:]
+        else:
+            return
+        self.fen = fen
+        self.moves = rest[1:] if rest and rest[0] == 'moves' else []
+
+    def start_search(self, options):
+        self.stop_search()
+        ai = self.get_ai()
+        position = self.create_position()
+
+        ai.depth = options.get('depth', MAX_SEARCH_DEPTH)
+        ai.node_limit = options.get('nodes')
+        ai.time_limit = None
+        if 'movetime' in options:
+            ai.time_limit = max(options['movetime'] - MOVE_OVERHEAD_MS, MIN_MOVE_TIME_MS) / 1000
+        elif not options.get('infinite'):
+            clock, increment = ('wtime', 'winc') if position.side_to_move == WHITE else ('btime', 'binc')
+            if clock in options:
+                ai.time_limit = time_for_move(options[clock], options.get(increment, 0), options.get('movestogo'))
+
+        self.stop_signal = threading.Event()
+        self.release = threading.Event()
+        ai.stop_signal = self.stop_signal
+        self.pondering = bool(options.get('ponder'))
+        # Set before the thread starts so that an early ponderhit cannot be undone
+        ai.pondering = self.pondering
+        wait = self.pondering or bool(options.get('infinite'))
+        self.search_thread = threading.Thread(target=self.run_search, args=(ai, position, wait), daemon=True)
+        self.search_thread.start()
+
+    def run_search(self, ai, position, wait):
+        side_to_move = position.side_to_move
+
+        def report(depth, value, nodes, seconds, pv):
+            milliseconds = int(seconds * 1000)
+            nps = int(nodes / seconds) if seconds > 0 else 0
+            self.send(f"info depth {depth} score {format_score(value, side_to_move)} nodes {nodes} nps {nps} "
+                      f"hashfull {ai.transposition_table.hashfull()} time {milliseconds} "
+                      f"pv {format_pv(pv_position, pv)}")
+
+        # The search plays its moves on position, so the pv is walked on a copy
+        pv_position = BitboardPosition.from_compact(position.to_compact(), ai.square_values)
+
+        best_move = None
+        if self.own_book and not wait and ai.opening_book is not None:
+            best_move = ai.opening_book.choose_move(position)
+            ai.ponder_move = None
+        if best_move is None:
+            ai.info_callback = report
+            try:
+                best_move, _ = ai.search(position)
+            finally:
+                ai.info_callback = None
+                ai.pondering = False
+        if best_move is None:
+            # Stopped before the first iteration finished
+            legal_moves = position.legal_moves()
+            best_move = legal_moves[0] if legal_moves else None
+
+        # UCI forbids answering an infinite or ponder search before stop or ponderhit
+        if wait:
+            self.release.wait()
+        if best_move is None:
+            self.send("bestmove 0000")
+            return
+        answer = f"bestmove {move_to_uci_text(position, best_move)}"
+        if self.ponder and ai.ponder_move is not None:
+            position.make_move(best_move)
+            answer += f" ponder {move_to_uci_text(position, ai.ponder_move)}"
+            position.undo_move()
+        self.send(answer)
+
+    def ponder_hit(self):
+        """The GUI's opponent played the ponder move: keep searching on our own clock"""
+        if not self.pondering:
+            return
+        self.pondering = False
+        if self.ai is not None:
+            self.ai.ponder_hit()
+        self.release.set()
+
+    def wait_for_search(self):
+        if self.search_thread is not None:
+            self.search_thread.join()
+            self.search_thread = None
+        self.pondering = False
+
+    def stop_search(self):
+        """Stop a running search; its bestmove is still sent, as UCI expects"""
+        if self.search_thread is not None:
+            self.stop_signal.set()
+            self.release.set()
+            self.wait_for_search()
+
+    def run(self, input_stream=sys.stdin):
+        for line in input_stream:
+            if not self.handle(line.strip()):
+                break
+        else:
+            self.stop_search()
+            self.reset_ai()
+
+
+def main():
+    # Helper processes forked for Threads > 1 close sys.stdin, which would wait on
+    # the lock held by the read in progress here, so read through a separate file object
+    with open(sys.stdin.fileno(), closefd=False) as commands:
+        UCIEngine().run(commands)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
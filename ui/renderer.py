@@ -0,0 +1,51 @@
+import pygame
+
+
+class LayeredRenderer:
+    """Redraws screen regions only when what they show has changed
+
+    Each region is a rect with a draw function.  Every frame the caller
+    passes a key per region, any value that changes whenever the drawing
+    would; only regions whose key changed are drawn, clipped to their rect,
+    and only their rects are sent to pygame.display.update.  An overlay
+    (menu, dialog, popup) may cover every region, so while one is open the
+    whole frame is drawn and flipped, and the frame after it closes is too.
+    """
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.regions = []
+        self.keys = {}
+        self.full_redraw = True
+
+    def add_region(self, name, rect, draw):
+        self.regions.append((name, pygame.Rect(rect), draw))
+
+    def invalidate(self):
+        """Draw every region on the next frame"""
+        self.full_redraw = True
+
+    def render(self, keys, draw_overlay=None):
+        """Draw one frame; returns the number of regions drawn"""
+        full_redraw = self.full_redraw or draw_overlay is not None
+        dirty = []
+        for name, rect, draw in self.regions:
+            key = keys[name]
+            if not full_redraw and self.keys.get(name) == key:
+                continue
+            self.screen.set_clip(rect)
+            draw()
+            self.screen.set_clip(None)
+            self.keys[name] = key
+            dirty.append(rect)
+
+        if draw_overlay is not None:
+            draw_overlay()
+            pygame.display.flip()
+            self.full_redraw = True
+        elif full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        elif dirty:
+            pygame.display.update(dirty)
+        return len(dirty)
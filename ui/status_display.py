@@ -175,8 +175,7 @@ class StatusDisplay:
             self.should_display = True
             self.current_turn = current_turn
 
-    def draw(self, screen):
-        self.draw_ai_stats(screen)
+    def expire_message(self):
         if not self.should_display or not self.current_message:
             return
 
@@ -186,6 +185,23 @@ class StatusDisplay:
         if elapsed > self.display_time and self.message_type not in ['checkmate', 'stalemate']:
             self.should_display = False
             self.current_message = ""
+
+    def state_key(self):
+        """Everything draw() shows, so the sidebar is only redrawn when this changes"""
+        self.expire_message()
+        return (
+            self.should_display,
+            self.current_message,
+            self.message_type,
+            self.checking_piece,
+            self.current_turn,
+            tuple(self.ai_stats.values())
+        )
+
+    def draw(self, screen):
+        self.draw_ai_stats(screen)
+        self.expire_message()
+        if not self.should_display or not self.current_message:
             return
 
         status_rect = pygame.Rect(